@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PPT批量文案提取
+按目录 / 通配符收集 PPT 文件，在进程池中并行导出 Word，全程无需交互
+清单文件记录每个源文件的大小、修改时间和内容哈希，输出仍是最新的文件直接跳过，中断后可继续
+使用方法：python3 batch_extract.py 目录或文件或通配符... [-o 输出目录] [-j 进程数]
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from extract_ppt import SmartPPTExtractor, DEFAULT_SLIDE_CACHE, BOILERPLATE_RATIO
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = '.ppt_batch_manifest.json'
+MANIFEST_VERSION = 1
+
+# 清单写盘的最短间隔（秒）；数千个文件时避免每完成一个就重写整个清单
+MANIFEST_SAVE_INTERVAL = 5
+
+# 通配符字符，用于找出模式中不含通配符的目录前缀
+GLOB_MAGIC = re.compile(r'[*?[]')
+
+
+def glob_base_dir(pattern):
+    """通配符模式中第一个含通配符的部分之前的目录：'archive/**/*.pptx' -> 'archive'"""
+    base = []
+    for part in pattern.replace(os.sep, '/').split('/'):
+        if GLOB_MAGIC.search(part):
+            break
+        base.append(part)
+    return '/'.join(base) or ('/' if pattern.startswith('/') else '.')
+
+
+def collect_inputs(patterns):
+    """
+    展开目录（递归）、通配符和单个文件，返回 [(源文件, 相对输出路径)]
+    相对路径保留目录（通配符为其不含通配符的目录前缀）内的子目录结构，避免不同子目录中的同名文件互相覆盖
+    """
+    inputs = []
+    seen = set()
+
+    def add(path, rel_path):
+        path = os.path.abspath(path)
+        name = os.path.basename(path)
+        # 跳过 Office 打开文件时生成的 ~$ 锁文件
+        if not name.lower().endswith('.pptx') or name.startswith('~$') or path in seen:
+            return
+        seen.add(path)
+        inputs.append((path, rel_path))
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, files in os.walk(pattern):
+                dirs.sort()
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    add(path, os.path.relpath(path, pattern))
+        elif os.path.isfile(pattern):
+            add(pattern, os.path.basename(pattern))
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                logger.warning("⚠️  没有匹配的文件: %s", pattern)
+            base_dir = glob_base_dir(pattern)
+            for path in matches:
+                if os.path.isfile(path):
+                    add(path, os.path.relpath(path, base_dir))
+    return inputs
+
+
+def output_path_for(source, rel_path, output_dir, extension='.docx', notes_only=False):
+    """与单文件模式一致的输出文件名；未指定输出目录时写在源文件旁边"""
+    base_name = os.path.splitext(os.path.basename(source))[0]
+    filename = f"{base_name}_{'演讲备注' if notes_only else '完整提取'}{extension}"
+    if output_dir is None:
+        return os.path.join(os.path.dirname(source), filename)
+    return os.path.join(os.path.abspath(output_dir), os.path.dirname(rel_path), filename)
+
+
+def file_sha256(path):
+    """分块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("⚠️  清单文件无法读取，将重新转换全部文件: %s", e)
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('files', {})
+
+
+def save_manifest(path, entries):
+    """先写临时文件再替换，中断时不会留下半个清单"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'files': entries}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def is_up_to_date(entry, source, output_path, options):
+    """
+    判断清单中的记录是否仍然有效
+    返回 (是否最新, 源文件哈希)；大小和修改时间都未变时不读取文件内容
+    """
+    if not entry or entry.get('options') != options or entry.get('output') != output_path:
+        return False, None
+    try:
+        output_stat = os.stat(output_path)
+    except OSError:
+        return False, None
+    if output_stat.st_mtime_ns != entry.get('output_mtime_ns'):
+        return False, None
+
+    stat = os.stat(source)
+    if stat.st_size == entry.get('size') and stat.st_mtime_ns == entry.get('mtime_ns'):
+        return True, entry.get('sha256')
+    # 修改时间变了（复制、touch）但内容可能没变，按哈希确认
+    sha256 = file_sha256(source)
+    return sha256 == entry.get('sha256'), sha256
+
+
+def init_batch_process(log_level):
+    """子进程只输出警告和错误，逐页日志会淹没批量进度"""
+    logging.basicConfig(level=log_level, format='%(message)s', stream=sys.stdout)
+    logging.getLogger().setLevel(log_level)
+
+
+def convert_one(source, output_path, engine, writer, slide_cache, output_format='docx', layout='columns',
+                boilerplate='keep', boilerplate_ratio=BOILERPLATE_RATIO, notes_only=False):
+    """
+    进程池任务：转换一个文件
+    先写入同目录下的临时文件再重命名，中断时不会留下看似完整的输出
+    """
+    start = time.perf_counter()
+    result = {'source': source, 'output': output_path}
+    tmp_path = f"{output_path}.partial"
+    try:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        extractor = SmartPPTExtractor(source, engine=engine, slide_cache=slide_cache, writer=writer,
+                                      output_format=output_format, layout=layout,
+                                      boilerplate=boilerplate, boilerplate_ratio=boilerplate_ratio,
+                                      notes_only=notes_only)
+        try:
+            stats = extractor.export_to_word_with_progress(tmp_path)
+        finally:
+            extractor.close()
+        os.replace(tmp_path, output_path)
+        # 重命名成功后才记录统计，失败的文件不计入汇总
+        result['text_blocks'] = stats['text_blocks']
+        result['slides'] = stats['slides']
+        result['slide_cache_hits'] = stats['cache_hits']
+        result['timings'] = {stage: round(seconds, 3) for stage, seconds in stats['timings'].items()}
+        result['status'] = 'converted'
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_batch(inputs, output_dir=None, manifest_path=None, summary_path=None, jobs=1,
+              engine='xml', writer='xml', slide_cache=None, force=False, worker_log_level=logging.WARNING,
+              output_format='docx', layout='columns', boilerplate='keep', boilerplate_ratio=BOILERPLATE_RATIO,
+              notes_only=False):
+    """批量转换，返回汇总信息（同时写入 summary_path）"""
+    started = time.time()
+    start = time.perf_counter()
+    options = {'engine': engine, 'writer': writer}
+    # 默认的 Word 格式、列优先排序、保留重复内容和完整提取不记录在选项中，已有清单的记录继续有效
+    if output_format != 'docx':
+        options['format'] = output_format
+    if layout != 'columns':
+        options['layout'] = layout
+    if boilerplate != 'keep':
+        options['boilerplate'] = boilerplate
+        options['boilerplate_ratio'] = boilerplate_ratio
+    if notes_only:
+        options['notes_only'] = True
+    extension = SmartPPTExtractor.OUTPUT_FORMATS[output_format][0]
+    manifest = load_manifest(manifest_path) if manifest_path else {}
+
+    # 先在主进程中判断哪些文件需要转换，只把需要的文件派发给进程池
+    results = []
+    pending = []
+    outputs = {}
+    for source, rel_path in inputs:
+        output_path = output_path_for(source, rel_path, output_dir, extension, notes_only)
+        # 不同源文件映射到同一输出路径时，并行写入会互相覆盖，只转换第一个
+        if output_path in outputs:
+            results.append({'source': source, 'output': output_path, 'status': 'failed',
+                            'error': f"输出路径与 {outputs[output_path]} 重复"})
+            logger.error("❌ %s: 输出路径与 %s 重复", source, outputs[output_path])
+            continue
+        outputs[output_path] = source
+        entry = manifest.get(source)
+        try:
+            up_to_date, sha256 = (False, None) if force else is_up_to_date(entry, source, output_path, options)
+        except OSError as e:
+            results.append({'source': source, 'output': output_path, 'status': 'failed', 'error': str(e)})
+            continue
+        if up_to_date:
+            stat = os.stat(source)
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            results.append({'source': source, 'output': output_path, 'status': 'skipped',
+                            'slides': entry.get('slides'), 'text_blocks': entry.get('text_blocks')})
+        else:
+            pending.append((source, output_path, sha256))
+
+    skipped = sum(1 for r in results if r['status'] == 'skipped')
+    logger.info("📂 共 %d 个文件：%d 个已是最新，%d 个待转换（%d 个进程）",
+                len(inputs), skipped, len(pending), jobs)
+
+    last_save = time.monotonic()
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_batch_process,
+                                 initargs=(worker_log_level,)) as pool:
+            futures = {}
+            for source, output_path, sha256 in pending:
+                future = pool.submit(convert_one, source, output_path, engine, writer, slide_cache,
+                                     output_format, layout, boilerplate, boilerplate_ratio, notes_only)
+                futures[future] = (source, sha256)
+
+            for done, future in enumerate(as_completed(futures), 1):
+                source, sha256 = futures[future]
+                result = future.result()
+                results.append(result)
+
+                if result['status'] == 'converted':
+                    logger.info("✅ [%d/%d] %s（%d 页，%d 个文本块，%.2fs）", done, len(pending), source,
+                                result['slides'], result['text_blocks'], result['seconds'])
+                    # 记录转换时的源文件状态，下次据此判断是否需要重新转换
+                    stat = os.stat(source)
+                    manifest[source] = {
+                        'size': stat.st_size,
+                        'mtime_ns': stat.st_mtime_ns,
+                        'sha256': sha256 or file_sha256(source),
+                        'output': result['output'],
+                        'output_mtime_ns': os.stat(result['output']).st_mtime_ns,
+                        'options': options,
+                        'slides': result['slides'],
+                        'text_blocks': result['text_blocks'],
+                    }
+                else:
+                    logger.error("❌ [%d/%d] %s: %s", done, len(pending), source, result['error'])
+                    manifest.pop(source, None)
+
+                if manifest_path and time.monotonic() - last_save >= MANIFEST_SAVE_INTERVAL:
+                    save_manifest(manifest_path, manifest)
+                    last_save = time.monotonic()
+    finally:
+        # 中断时也保存已完成的部分，下次从断点继续
+        if manifest_path:
+            save_manifest(manifest_path, manifest)
+
+    converted = [r for r in results if r['status'] == 'converted']
+    summary = {
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started)),
+        'seconds': round(time.perf_counter() - start, 3),
+        'jobs': jobs,
+        'options': options,
+        'total': len(inputs),
+        'converted': len(converted),
+        'skipped': skipped,
+        'failed': sum(1 for r in results if r['status'] == 'failed'),
+        'text_blocks': sum(r.get('text_blocks') or 0 for r in results),
+        'files': results,
+    }
+    if summary_path:
+        os.makedirs(os.path.dirname(summary_path) or '.', exist_ok=True)
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="PPT批量文案提取工具")
+    parser.add_argument('inputs', nargs='+', help="PPT文件、目录（递归查找 .pptx）或通配符，如 'archive/**/*.pptx'")
+    parser.add_argument('-o', '--output-dir',
+                        help="输出目录，目录和通配符输入的子目录结构会保留；省略时输出到各源文件旁边")
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help="并行转换的进程数，0 表示使用全部CPU核心（默认）")
+    parser.add_argument('--engine', choices=SmartPPTExtractor.ENGINES, default='xml',
+                        help="提取引擎（默认 xml）")
+    parser.add_argument('--writer', choices=tuple(SmartPPTExtractor.WRITERS), default='xml',
+                        help="Word写入器（默认 xml）")
+    parser.add_argument('--format', dest='output_format', choices=tuple(SmartPPTExtractor.OUTPUT_FORMATS),
+                        default='docx', help="输出格式：docx（默认）、md、txt 或 jsonl")
+    parser.add_argument('--layout', choices=SmartPPTExtractor.LAYOUTS, default='columns',
+                        help="阅读顺序：columns（默认，列优先）或 xycut")
+    parser.add_argument('--boilerplate', choices=SmartPPTExtractor.BOILERPLATE_MODES, default='keep',
+                        help="跨页重复的页眉、页脚、页码等文本：keep（默认）、once（只保留第一次出现）或 drop（全部省略）")
+    parser.add_argument('--boilerplate-ratio', type=float, default=BOILERPLATE_RATIO,
+                        help=f"出现在超过该比例页面上的同位置文本视为重复内容（默认 {BOILERPLATE_RATIO}）")
+    parser.add_argument('--notes-only', action='store_true', help="只导出演讲备注（讲稿）")
+    parser.add_argument('--manifest',
+                        help=f"清单文件路径（默认 输出目录/{MANIFEST_NAME}，未指定输出目录时为当前目录）")
+    parser.add_argument('--summary', help="JSON 汇总输出路径（默认 输出目录/batch_summary.json）")
+    parser.add_argument('--slide-cache', default=DEFAULT_SLIDE_CACHE,
+                        help=f"单页缓存数据库路径（默认 {DEFAULT_SLIDE_CACHE}）")
+    parser.add_argument('--no-slide-cache', dest='slide_cache', action='store_const', const=None,
+                        help="禁用单页缓存")
+    parser.add_argument('--force', action='store_true', help="忽略清单，全部重新转换")
+    parser.add_argument('-v', '--verbose', action='store_true', help="输出子进程的逐页日志")
+    args = parser.parse_args(argv)
+    if not 0 <= args.boilerplate_ratio < 1:
+        parser.error("--boilerplate-ratio 需在 0 到 1 之间")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+
+    jobs = args.jobs or os.cpu_count() or 1
+    state_dir = args.output_dir or os.getcwd()
+    manifest_path = args.manifest or os.path.join(state_dir, MANIFEST_NAME)
+    summary_path = args.summary or os.path.join(state_dir, 'batch_summary.json')
+
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        logger.error("❌ 没有找到 .pptx 文件")
+        return 1
+
+    try:
+        summary = run_batch(inputs, args.output_dir, manifest_path, summary_path, jobs,
+                            engine=args.engine, writer=args.writer, slide_cache=args.slide_cache,
+                            force=args.force, output_format=args.output_format, layout=args.layout,
+                            boilerplate=args.boilerplate, boilerplate_ratio=args.boilerplate_ratio,
+                            notes_only=args.notes_only,
+                            worker_log_level=logging.INFO if args.verbose else logging.WARNING)
+    except KeyboardInterrupt:
+        logger.warning("\n⚠️  用户中断操作，已完成的文件记录在清单中，重新运行即可继续")
+        return 130
+
+    logger.info("\n📊 转换 %d 个，跳过 %d 个，失败 %d 个，共 %d 个文本块，耗时 %.1fs",
+                summary['converted'], summary['skipped'], summary['failed'],
+                summary['text_blocks'], summary['seconds'])
+    logger.info("📝 汇总: %s", summary_path)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
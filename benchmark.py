@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PPT提取性能基准测试
+生成合成 PPT 文件（可配置页数、文本框数、组合嵌套深度、表格大小、备注和长文本），
+对比几种打开方式的耗时和内存，对每种 提取引擎 × Word写入器 组合分阶段计时：打开、提取、排序、写入 Word、保存，
+并报告吞吐量（页/秒、文本框/秒）和峰值内存，最后对单页大量文本框比较列优先排序与 XY-cut 的耗时，
+可输出 JSON 便于逐次对比
+使用方法：python3 benchmark.py [--slides 100] [--shapes 30] [--json 结果.json] ...
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pptx import Presentation
+from pptx.util import Emu, Pt
+from extract_ppt import SmartPPTExtractor, PptxPackageReader, TextBox, load_text_only
+import xy_cut
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import zipfile
+import zlib
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不统计峰值内存
+    resource = None
+
+STAGES = ('open', 'extract', 'sort', 'write', 'save')
+STAGE_LABELS = {'open': '打开', 'extract': '提取', 'sort': '排序', 'write': '写入', 'save': '保存'}
+
+
+def tiny_png(seed):
+    """生成 1×1 像素的 PNG（颜色由 seed 决定，保证每页图片内容不同、不会被合并为同一个部件）"""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    pixel = bytes([0, seed % 256, (seed // 256) % 256, (seed // 65536) % 256])
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', 1, 1, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(pixel)) + chunk(b'IEND', b''))
+
+
+def inflate_media(path, media_mb):
+    """把 ppt/media 下的图片用随机数据补齐到总计 media_mb MB（PNG 在 IEND 之后的数据会被忽略）"""
+    tmp_path = f"{path}.tmp"
+    chunk_size = 1024 * 1024
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        media = {item.filename for item in src.infolist() if item.filename.startswith('ppt/media/')}
+        padding = media_mb * 1024 * 1024 // max(1, len(media))
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename not in media:
+                dst.writestr(item.filename, data)
+                continue
+            # 随机数据无法压缩，按存储方式写入，与真实视频/图片的情况一致
+            with dst.open(zipfile.ZipInfo(item.filename), 'w', force_zip64=True) as f:
+                f.write(data)
+                for start in range(0, padding, chunk_size):
+                    f.write(os.urandom(min(chunk_size, padding - start)))
+    os.replace(tmp_path, path)
+
+
+def generate_deck(path, slides=100, shapes_per_slide=30, group_depth=1, table_size=(4, 3),
+                  notes=True, long_text=0, media_mb=0, footers=False):
+    """
+    生成合成 PPT
+    group_depth: 组合形状嵌套层数（0 表示不添加组合）
+    table_size: (行数, 列数)，None 或 (0, 0) 表示不添加表格
+    notes: 偶数页添加演讲备注
+    long_text: 每页额外添加一个包含该字数长文本的文本框（0 表示不添加）
+    media_mb: 每页添加一张图片，所有图片合计约 media_mb MB（0 表示不添加），用于测试内存占用
+    footers: 每页添加企业模板常见的页脚、保密声明和页码文本框，用于测试跨页重复内容处理
+    """
+    prs = Presentation()
+    layout = prs.slide_layouts[6]  # 空白版式
+    rows, cols = table_size or (0, 0)
+
+    for slide_idx in range(slides):
+        slide = prs.slides.add_slide(layout)
+
+        for shape_idx in range(shapes_per_slide):
+            left = Emu(300000 + (shape_idx % 4) * 2200000)
+            top = Emu(300000 + (shape_idx // 4) * 500000)
+            box = slide.shapes.add_textbox(left, top, Emu(2000000), Emu(400000))
+            run = box.text_frame.paragraphs[0].add_run()
+            run.text = f"第{slide_idx + 1}页 文本框{shape_idx + 1} 示例文案内容"
+            run.font.size = Pt(12 + (shape_idx % 3) * 6)
+            run.font.name = '微软雅黑'
+
+        # 逐层嵌套的组合形状，每层包含一个文本框和下一层组合，最内层包含三个文本框
+        shapes = slide.shapes
+        for depth in range(group_depth):
+            group = shapes.add_group_shape()
+            for i in range(3 if depth == group_depth - 1 else 1):
+                sub = group.shapes.add_textbox(Emu(6000000 + depth * 100000), Emu(3000000 + i * 400000),
+                                               Emu(1500000), Emu(300000))
+                sub.text_frame.text = f"组合第{depth + 1}层文本 {i + 1}"
+            shapes = group.shapes
+
+        if rows and cols:
+            table = slide.shapes.add_table(rows, cols, Emu(300000), Emu(5000000),
+                                           Emu(6000000), Emu(1200000)).table
+            for r in range(rows):
+                for c in range(cols):
+                    table.cell(r, c).text = f"R{r + 1}C{c + 1}"
+
+        if long_text:
+            box = slide.shapes.add_textbox(Emu(300000), Emu(6200000), Emu(8000000), Emu(400000))
+            sentence = "这是一段用于测试长文本处理性能的示例文案。"
+            text = (sentence * (long_text // len(sentence) + 1))[:long_text]
+            box.text_frame.text = '\n'.join(text[i:i + 200] for i in range(0, len(text), 200))
+
+        if footers:
+            for left, text in ((300000, "某某科技有限公司 2025 年度经营分析"),
+                               (4500000, "机密 · 仅限内部使用，未经许可不得外传"),
+                               (11000000, f"{slide_idx + 1}")):
+                box = slide.shapes.add_textbox(Emu(left), Emu(6450000), Emu(4000000), Emu(300000))
+                box.text_frame.text = text
+
+        if media_mb:
+            slide.shapes.add_picture(io.BytesIO(tiny_png(slide_idx)), Emu(9000000), Emu(300000),
+                                     Emu(2000000), Emu(1500000))
+
+        if notes and slide_idx % 2 == 0:
+            slide.notes_slide.notes_text_frame.text = f"第{slide_idx + 1}页的演讲备注"
+
+    prs.save(path)
+    if media_mb:
+        inflate_media(path, media_mb)
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存（MB），macOS 上 ru_maxrss 单位为字节，Linux 上为 KB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_stages(ppt_path, engine, writer, layout='columns'):
+    """
+    按阶段执行一次完整导出，返回各阶段耗时、文本框数、峰值内存和文本指纹（文本、坐标和顺序）
+    提取和排序需要分开计时，因此不使用单页缓存
+    """
+    timings = dict.fromkeys(STAGES, 0.0)
+    base_rss = peak_rss_mb()
+    output_path = os.path.join(os.path.dirname(ppt_path), f'benchmark_{engine}_{writer}.docx')
+    fingerprint = hashlib.sha256()
+    box_count = 0
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        extractor = SmartPPTExtractor(ppt_path, engine=engine, writer=writer, layout=layout)
+        timings['open'] = time.perf_counter() - start
+
+        doc_writer = extractor.create_writer(output_path)
+        for slide_num, slide in enumerate(extractor.iter_slides(), 1):
+            start = time.perf_counter()
+            text_boxes = extractor.extract_slide_texts(slide)
+            extracted = time.perf_counter()
+            sorted_boxes = extractor.sort_boxes(text_boxes)
+            sorted_at = time.perf_counter()
+            timings['extract'] += extracted - start
+            timings['sort'] += sorted_at - extracted
+
+            doc_writer.add_slide_heading(slide_num)
+            if not sorted_boxes:
+                doc_writer.add_empty_notice()
+            for tb in sorted_boxes:
+                doc_writer.add_box(tb)
+            doc_writer.add_page_break()
+            timings['write'] += time.perf_counter() - sorted_at
+
+            box_count += len(sorted_boxes)
+            # 按输出顺序记录文本和坐标：两种引擎的组合形状坐标换算、排序结果都应一致
+            fingerprint.update(json.dumps([(tb.text, int(tb.left), int(tb.top), int(tb.width), int(tb.height))
+                                           for tb in sorted_boxes], ensure_ascii=False).encode('utf-8'))
+
+        start = time.perf_counter()
+        doc_writer.close()
+        timings['save'] = time.perf_counter() - start
+        extractor.close()
+
+    with zipfile.ZipFile(output_path) as docx_zip:
+        document_size = docx_zip.getinfo('word/document.xml').file_size
+    return {
+        'engine': engine,
+        'writer': writer,
+        'slides': extractor.slide_count,
+        'boxes': box_count,
+        'timings': timings,
+        'total': sum(timings.values()),
+        'output_bytes': os.path.getsize(output_path),
+        'document_xml_bytes': document_size,
+        'base_rss_mb': base_rss,
+        'peak_rss_mb': peak_rss_mb(),
+        'text_fingerprint': fingerprint.hexdigest(),
+    }
+
+
+def run_boilerplate(ppt_path, mode):
+    """按 boilerplate 选项完整导出一次（xml 引擎 + xml 写入器），返回耗时、输出大小和省略的文本框数"""
+    output_path = os.path.join(os.path.dirname(ppt_path), f'benchmark_boilerplate_{mode}.docx')
+    with contextlib.redirect_stdout(io.StringIO()):
+        extractor = SmartPPTExtractor(ppt_path, engine='xml', writer='xml', boilerplate=mode)
+        try:
+            stats = extractor.export_to_word_with_progress(output_path)
+        finally:
+            extractor.close()
+    with zipfile.ZipFile(output_path) as docx_zip:
+        document_size = docx_zip.getinfo('word/document.xml').file_size
+    return {
+        'mode': mode,
+        'text_blocks': stats['text_blocks'],
+        'removed': stats['boilerplate_removed'],
+        'write': stats['timings']['write'],
+        'total': stats['timings']['total'],
+        'output_bytes': os.path.getsize(output_path),
+        'document_xml_bytes': document_size,
+    }
+
+
+def measure_open(ppt_path, method):
+    """
+    打开方式对比：'presentation' 为 python-pptx 直接打开（读取全部部件），
+    'text_only' 为 load_text_only（跳过媒体和嵌入对象），'xml' 为 xml 引擎的压缩包读取器
+    返回 (耗时, 打开后的峰值内存, 打开前的内存)
+    """
+    base_rss = peak_rss_mb()
+    start = time.perf_counter()
+    if method == 'presentation':
+        opened = Presentation(ppt_path)
+    elif method == 'text_only':
+        opened = load_text_only(ppt_path)
+    else:
+        opened = PptxPackageReader(ppt_path)
+    elapsed = time.perf_counter() - start
+    del opened
+    return elapsed, peak_rss_mb(), base_rss
+
+
+def run_isolated(ppt_path, engine, writer, repeat=1, layout='columns'):
+    """每次运行使用全新的 spawn 进程，峰值内存互不影响；重复多次时取总耗时最短的一次"""
+    best = None
+    for _ in range(repeat):
+        result = in_new_process(run_stages, ppt_path, engine, writer, layout)
+        if best is None or result['total'] < best['total']:
+            best = result
+    return best
+
+
+def in_new_process(func, *args):
+    """在全新的 spawn 进程中执行 func，返回其结果"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(func, *args).result()
+
+
+def random_boxes(box_count):
+    """单页 box_count 个随机位置的文本框"""
+    rng = random.Random(42)
+    return [TextBox(f"标签{i}", rng.randint(0, 12192000), rng.randint(0, 6858000), 12.0,
+                    width=rng.randint(100000, 800000), height=200000)
+            for i in range(box_count)]
+
+
+def grid_boxes(box_count):
+    """单页约 box_count 个文本框排成的卡片网格（行列间均有空白），用于测试多层切分"""
+    cols = max(1, int(box_count ** 0.5))
+    rows = -(-box_count // cols)
+    cell_width, cell_height = 12192000 // cols, 6858000 // rows
+    return [TextBox(f"卡片{i}", (i % cols) * cell_width, (i // cols) * cell_height, 12.0,
+                    width=max(1, cell_width * 4 // 5), height=max(1, cell_height * 4 // 5))
+            for i in range(box_count)]
+
+
+def time_column_sort(box_count, use_width=False):
+    """单页 box_count 个随机文本框的列优先排序耗时"""
+    text_boxes = random_boxes(box_count)
+    extractor = SmartPPTExtractor.__new__(SmartPPTExtractor)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        extractor.column_based_sort(text_boxes, use_width=use_width)
+    return time.perf_counter() - start
+
+
+def time_xy_cut(text_boxes, use_numpy):
+    """XY-cut 排序耗时，use_numpy=False 时强制使用纯 Python 实现"""
+    saved = xy_cut.np
+    if not use_numpy:
+        xy_cut.np = None
+    try:
+        start = time.perf_counter()
+        xy_cut.xy_cut_sort(text_boxes)
+        return time.perf_counter() - start
+    finally:
+        xy_cut.np = saved
+
+
+def print_result(result):
+    timings = result['timings']
+    stages = '  '.join(f"{STAGE_LABELS[stage]} {timings[stage]:.3f}s" for stage in STAGES)
+    extract_sort = (timings['extract'] + timings['sort']) or float('inf')
+    memory = f"  峰值内存 {result['peak_rss_mb']:.0f}MB" if result['peak_rss_mb'] is not None else ''
+    print(f"  {result['engine']:>4} + {result['writer']:<4}: {stages}  | 合计 {result['total']:.3f}s")
+    print(f"  {'':>11}  {result['slides'] / result['total']:.1f} 页/秒  "
+          f"{result['boxes'] / extract_sort:.0f} 文本框/秒(提取+排序)  "
+          f"输出 {result['output_bytes'] / 1024:.1f}KB{memory}")
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="PPT提取性能基准测试")
+    parser.add_argument('--slides', type=int, default=100, help="页数（默认100）")
+    parser.add_argument('--shapes', type=int, default=30, help="每页普通文本框数（默认30）")
+    parser.add_argument('--group-depth', type=int, default=1, help="组合形状嵌套层数（默认1，0为不添加）")
+    parser.add_argument('--table', default='4x3', help="每页表格的 行x列（默认 4x3，0x0 为不添加）")
+    parser.add_argument('--no-notes', dest='notes', action='store_false', help="不添加演讲备注")
+    parser.add_argument('--long-text', type=int, default=0, help="每页长文本框的字数（默认0，不添加）")
+    parser.add_argument('--footers', action='store_true',
+                        help="每页添加页脚、保密声明和页码，并对比跨页重复内容的处理方式")
+    parser.add_argument('--media-mb', type=int, default=0,
+                        help="每页添加图片，合计约多少 MB（默认0，不添加），用于测试大文件的内存占用")
+    parser.add_argument('--sort-boxes', type=int, default=10000,
+                        help="排序压力测试的文本框数（默认10000，0为跳过）")
+    parser.add_argument('--engines', nargs='+', choices=SmartPPTExtractor.ENGINES,
+                        default=list(SmartPPTExtractor.ENGINES), help="参与测试的提取引擎")
+    parser.add_argument('--writers', nargs='+', choices=tuple(SmartPPTExtractor.WRITERS),
+                        default=list(SmartPPTExtractor.WRITERS), help="参与测试的Word写入器")
+    parser.add_argument('--layout', choices=SmartPPTExtractor.LAYOUTS, default='columns',
+                        help="分阶段计时使用的阅读顺序（默认 columns）")
+    parser.add_argument('--repeat', type=int, default=1, help="每种组合重复次数，取最快一次（默认1）")
+    parser.add_argument('--ppt', help="使用已有的PPT文件代替合成文件")
+    parser.add_argument('--json', dest='json_path', help="将结果写入 JSON 文件，便于逐次对比")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    rows, cols = (int(n) for n in args.table.lower().split('x'))
+    report = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ppt_path = os.path.join(tmp_dir, 'benchmark.pptx')
+        if args.ppt:
+            shutil.copyfile(args.ppt, ppt_path)
+            report['deck'] = {'path': os.path.abspath(args.ppt)}
+            print(f"📂 使用已有 PPT: {args.ppt}")
+        else:
+            report['deck'] = {
+                'slides': args.slides, 'shapes_per_slide': args.shapes, 'group_depth': args.group_depth,
+                'table_size': [rows, cols], 'notes': args.notes, 'long_text': args.long_text,
+                'media_mb': args.media_mb, 'footers': args.footers,
+            }
+            print(f"🛠  生成合成 PPT: {args.slides} 页 × {args.shapes} 个文本框，组合嵌套 {args.group_depth} 层，"
+                  f"表格 {rows}×{cols}，备注{'有' if args.notes else '无'}，长文本 {args.long_text} 字，"
+                  f"图片 {args.media_mb}MB{'，每页页脚' if args.footers else ''}")
+            generate_deck(ppt_path, args.slides, args.shapes, args.group_depth, (rows, cols),
+                          args.notes, args.long_text, args.media_mb, args.footers)
+        report['deck']['file_bytes'] = os.path.getsize(ppt_path)
+
+        print("\n📂 打开方式对比（独立进程）")
+        report['open'] = {}
+        for method, label in (('presentation', 'python-pptx 全部部件'), ('text_only', '仅文本部件'),
+                              ('xml', 'xml 引擎读取器')):
+            elapsed, peak, base = in_new_process(measure_open, ppt_path, method)
+            report['open'][method] = {'seconds': elapsed, 'peak_rss_mb': peak, 'base_rss_mb': base}
+            memory = f"  峰值内存 {peak:.0f}MB（打开前 {base:.0f}MB）" if peak is not None else ''
+            print(f"  {label:<14}: {elapsed:.3f}s{memory}")
+
+        print(f"\n⏱  分阶段耗时（每种组合在独立进程中运行，{args.repeat} 次取最快）")
+        for engine in args.engines:
+            for writer in args.writers:
+                result = run_isolated(ppt_path, engine, writer, args.repeat, args.layout)
+                report['runs'].append(result)
+                print_result(result)
+
+        if args.footers:
+            print("\n📊 跨页重复内容（xml 引擎 + xml 写入器，独立进程）")
+            report['boilerplate'] = {}
+            for mode in SmartPPTExtractor.BOILERPLATE_MODES:
+                result = in_new_process(run_boilerplate, ppt_path, mode)
+                report['boilerplate'][mode] = result
+                print(f"  {mode:<4}: 文本块 {result['text_blocks']}（省略 {result['removed']}）  "
+                      f"写入 {result['write']:.3f}s  合计 {result['total']:.3f}s  "
+                      f"输出 {result['output_bytes'] / 1024:.1f}KB（document.xml {result['document_xml_bytes'] / 1024:.1f}KB）")
+            # 保留的文本块 + 省略的文本框应等于 keep 模式的文本块总数
+            keep_blocks = report['boilerplate']['keep']['text_blocks']
+            mismatched = [mode for mode, result in report['boilerplate'].items()
+                          if result['text_blocks'] + result['removed'] != keep_blocks]
+            if mismatched:
+                print(f"  ❌ 文本块 + 省略数与 keep 模式不一致: {', '.join(mismatched)}")
+            else:
+                print("  ✅ 文本块 + 省略数与 keep 模式一致")
+
+    runs = {(r['engine'], r['writer']): r for r in report['runs']}
+    if len(runs) > 1:
+        consistent = len({r['text_fingerprint'] for r in report['runs']}) == 1
+        print("\n✅ 各组合提取的文本、位置和顺序一致" if consistent else "\n❌ 各组合提取的文本、位置或顺序不一致")
+    if ('pptx', 'docx') in runs and ('xml', 'xml') in runs:
+        print(f"⚡ xml 引擎 + xml 写入器 总加速: "
+              f"{runs['pptx', 'docx']['total'] / runs['xml', 'xml']['total']:.1f}x")
+
+    if args.sort_boxes:
+        print(f"\n📊 列优先排序: 单页 {args.sort_boxes} 个文本框")
+        report['column_sort'] = {}
+        for use_width in (False, True):
+            elapsed = time_column_sort(args.sort_boxes, use_width)
+            label = "按重叠分列" if use_width else "按left分列"
+            report['column_sort']['use_width' if use_width else 'left'] = elapsed
+            print(f"  {label}: {elapsed * 1000:.1f}ms ({args.sort_boxes / elapsed:.0f} 个/秒)")
+
+        print(f"\n📊 XY-cut 阅读顺序: 单页 {args.sort_boxes} 个文本框")
+        report['xy_cut'] = {}
+        implementations = (('numpy', True), ('python', False)) if xy_cut.np is not None else (('python', False),)
+        for layout_name, label, text_boxes in (('random', '随机位置', random_boxes(args.sort_boxes)),
+                                               ('grid', '卡片网格', grid_boxes(args.sort_boxes))):
+            for implementation, use_numpy in implementations:
+                elapsed = time_xy_cut(text_boxes, use_numpy)
+                report['xy_cut'][f'{layout_name}_{implementation}'] = elapsed
+                print(f"  {label} ({implementation:<6}): {elapsed * 1000:.1f}ms ({args.sort_boxes / elapsed:.0f} 个/秒)")
+        if xy_cut.np is None:
+            print("  （未安装 numpy，只测试纯 Python 实现）")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 结果已写入: {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨页重复内容识别
+企业模板在每页重复相同的页脚、保密声明、页码和 Logo 文字。以「规范化文本 + 位置区间」为指纹，
+统计每个指纹出现在多少页上，超过一定比例页面的视为模板内容，导出时只保留第一次出现或全部省略
+"""
+
+import re
+from collections import Counter
+
+DIGITS = re.compile(r'\d+')
+
+# 位置区间边长（EMU，约 1.27cm）：同一模板元素在各页的坐标可能有细微偏差
+POSITION_BAND = 457200
+
+# 默认比例：出现在超过一半页面上的文本视为模板内容
+DEFAULT_RATIO = 0.5
+
+# 页数少于该值时不识别：两三页的文件无法区分模板内容和正文
+MIN_SLIDES = 3
+
+# 页码类文本（「3」「- 3 -」「第 3 页」「Page 3 of 40」）去掉这些内容后为空，比较时忽略其中的数字；
+# 其余文本保留数字，避免「第 3 章 概述」这类正文在各页同一位置时被误判为模板内容
+PAGE_NUMBER_PARTS = re.compile(r'\d+|page|slide|of|p|第|页|共|[\W_]+')
+
+
+def normalize_text(text):
+    """合并空白、忽略大小写；页码类短文本的数字统一替换为 #（「第 3 页」与「第 4 页」视为相同）"""
+    text = ' '.join(text.split()).casefold()
+    if DIGITS.search(text) and not PAGE_NUMBER_PARTS.sub('', text):
+        return DIGITS.sub('#', text)
+    return text
+
+
+def box_band(box, band=POSITION_BAND):
+    """文本框所在的 (横向区间, 纵向区间)"""
+    return int(box.left) // band, int(box.top) // band
+
+
+def box_fingerprint(box, band=POSITION_BAND):
+    """文本框指纹：(横向区间, 纵向区间, 规范化文本)"""
+    return box_band(box, band) + (normalize_text(box.text),)
+
+
+def find_boilerplate(slides, ratio=DEFAULT_RATIO, band=POSITION_BAND):
+    """
+    slides 为各页的文本框列表（出错的页为 None，仍计入总页数）
+    返回出现在超过 ratio 比例页面上（且至少两页）的指纹集合
+    """
+    if len(slides) < MIN_SLIDES:
+        return set()
+    counts = Counter()
+    for text_boxes in slides:
+        if text_boxes:
+            # 同一页内重复的指纹只计一次
+            counts.update({box_fingerprint(box, band) for box in text_boxes})
+    threshold = ratio * len(slides)
+    return {fingerprint for fingerprint, count in counts.items() if count > threshold and count >= 2}
+
+
+class BoilerplateFilter:
+    """
+    按指纹逐页过滤文本框
+    mode='once' 保留每种模板内容第一次出现的文本框，'drop' 全部省略
+    """
+
+    def __init__(self, fingerprints, mode='drop', band=POSITION_BAND):
+        self.fingerprints = fingerprints
+        self.mode = mode
+        self.band = band
+        # 只有落在这些位置区间内的文本框才需要规范化文本再比较
+        self.bands = {fingerprint[:2] for fingerprint in fingerprints}
+        self.seen = set()
+        self.removed = 0
+
+    def apply(self, text_boxes):
+        """返回过滤后的文本框列表，保持原有顺序"""
+        if not self.fingerprints:
+            return text_boxes
+        kept = []
+        for box in text_boxes:
+            band = box_band(box, self.band)
+            if band in self.bands:
+                fingerprint = band + (normalize_text(box.text),)
+                if fingerprint in self.fingerprints:
+                    if self.mode != 'once' or fingerprint in self.seen:
+                        self.removed += 1
+                        continue
+                    self.seen.add(fingerprint)
+            kept.append(box)
+        return kept
@@ -92,7 +92,7 @@ echo -e "${GREEN}      ✓ 虚拟环境已创建${NC}"
 echo -e "${BLUE}[5/8]${NC} 📦 安装 Python 依赖..."
 
 # 安装依赖到虚拟环境
-"$APP_PATH/Contents/Resources/venv/bin/pip" install --quiet flask python-pptx python-docx werkzeug Pillow
+"$APP_PATH/Contents/Resources/venv/bin/pip" install --quiet "flask>=2.3" python-pptx python-docx "werkzeug>=2.3" Pillow
 
 echo -e "${GREEN}      ✓ 依赖安装完成${NC}"
 
@@ -100,6 +100,11 @@ echo -e "${GREEN}      ✓ 依赖安装完成${NC}"
 echo -e "${BLUE}[6/8]${NC} 📋 复制应用文件..."
 cp "$CURRENT_DIR/server.py" "$APP_PATH/Contents/Resources/"
 cp "$CURRENT_DIR/extract_ppt.py" "$APP_PATH/Contents/Resources/"
+cp "$CURRENT_DIR/docx_writer.py" "$APP_PATH/Contents/Resources/"
+cp "$CURRENT_DIR/text_writers.py" "$APP_PATH/Contents/Resources/"
+cp "$CURRENT_DIR/xy_cut.py" "$APP_PATH/Contents/Resources/"
+cp "$CURRENT_DIR/boilerplate.py" "$APP_PATH/Contents/Resources/"
+cp "$CURRENT_DIR/sse_server.py" "$APP_PATH/Contents/Resources/"
 cp "$CURRENT_DIR/templates/index.html" "$APP_PATH/Contents/Resources/templates/"
 cp "$CURRENT_DIR/static/style.css" "$APP_PATH/Contents/Resources/static/"
 cp "$CURRENT_DIR/static/script.js" "$APP_PATH/Contents/Resources/static/"
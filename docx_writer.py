@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Word 文档写入器
+DocxWriter 使用 python-docx 对象模型构建文档后保存；
+FastDocxWriter 直接把 document.xml 逐段流式写入输出压缩包
+两者的段落格式都来自命名样式（字号层级 + 原始字体），段落本身不带 run 级格式
+"""
+
+from docx import Document
+from docx.shared import Pt
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from lxml import etree
+from xml.sax.saxutils import escape
+import docx
+import os
+import zipfile
+
+DEFAULT_FONT = '微软雅黑'
+
+# python-docx 自带的空白模板，FastDocxWriter 复用其中的样式、主题和页面设置
+TEMPLATE_PATH = os.path.join(os.path.dirname(docx.__file__), 'templates', 'default.docx')
+
+NS_W = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+# 1 twip（1/20 磅）= 635 EMU
+EMU_PER_TWIP = 635
+
+# 各层级对应的段落样式：(样式ID, 样式名, 字号(磅), 是否加粗)，None 表示使用模板自带的样式
+TIER_STYLES = {
+    'title': ('Heading2', None, None, None),
+    'subtitle': ('PPTSubtitle', 'PPT 中标题', 15, True),
+    'heading': ('PPTHeading', 'PPT 小标题', 12, False),
+    'body': ('PPTBody', 'PPT 正文', 11, False),
+}
+
+
+def text_xml(part):
+    """生成 w:t；只有首尾带空白时才需要 xml:space=preserve"""
+    if part != part.strip():
+        return f'<w:t xml:space="preserve">{escape(part)}</w:t>'
+    return f'<w:t>{escape(part)}</w:t>'
+
+
+def run_xml(text):
+    """生成 run XML：换行写为 w:br，制表符写为 w:tab（与 python-docx 一致）"""
+    lines = []
+    for line in text.split('\n'):
+        lines.append('<w:tab/>'.join(text_xml(part) for part in line.split('\t')))
+    return f'<w:r>{"<w:br/>".join(lines)}</w:r>'
+
+
+def table_xml(table, max_width, cell_style, namespaces=''):
+    """
+    生成 w:tbl XML：列宽取自 PPT 的 a:gridCol（超出版心时等比缩小），
+    合并单元格写为 gridSpan / vMerge，被横向合并覆盖的单元格不输出
+    max_width 为版心宽度（twip），cell_style 为单元格段落样式ID，
+    namespaces 为根元素上的命名空间声明（单独解析这段 XML 时需要）
+    """
+    columns = [max(1, round(width / EMU_PER_TWIP)) for width in table['columns']]
+    for row in table['rows']:
+        # 行中的单元格数多于网格列数时（异常文件）补足列
+        extra = len(row) - len(columns)
+        if extra > 0:
+            columns += [columns[-1] if columns else max_width // len(row)] * extra
+    scale = min(1.0, max_width / sum(columns)) if columns else 1.0
+    columns = [max(1, int(width * scale)) for width in columns]
+
+    parts = [f'<w:tbl{namespaces}><w:tblPr><w:tblStyle w:val="TableGrid"/><w:tblW w:w="0" w:type="auto"/>'
+             '<w:tblLayout w:type="fixed"/><w:tblLook w:val="04A0"/></w:tblPr><w:tblGrid>']
+    parts.extend(f'<w:gridCol w:w="{width}"/>' for width in columns)
+    parts.append('</w:tblGrid>')
+
+    # 列号 -> [剩余的纵向合并行数, 合并宽度(列数)]
+    vertical = {}
+    for row in table['rows']:
+        parts.append('<w:tr>')
+        col = 0
+        while col < len(row):
+            cell = row[col]
+            if cell is not None:
+                span = max(1, min(cell['col_span'], len(columns) - col))
+                merge = '<w:vMerge w:val="restart"/>' if cell['row_span'] > 1 else ''
+                if cell['row_span'] > 1:
+                    vertical[col] = [cell['row_span'] - 1, span]
+                else:
+                    vertical.pop(col, None)
+                text = cell['text']
+            elif vertical.get(col, [0])[0] > 0:
+                # 被上方合并单元格覆盖：输出 vMerge 延续单元格
+                vertical[col][0] -= 1
+                span = vertical[col][1]
+                merge = '<w:vMerge/>'
+                text = ''
+            else:
+                # 被左侧合并单元格覆盖的位置已由 gridSpan 占据
+                col += 1
+                continue
+            width = sum(columns[col:col + span])
+            grid_span = f'<w:gridSpan w:val="{span}"/>' if span > 1 else ''
+            run = run_xml(text) if text else ''
+            parts.append(f'<w:tc><w:tcPr><w:tcW w:w="{width}" w:type="dxa"/>{grid_span}{merge}</w:tcPr>'
+                         f'<w:p><w:pPr><w:pStyle w:val="{cell_style}"/></w:pPr>{run}</w:p></w:tc>')
+            col += span
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+    return ''.join(parts)
+
+
+def font_style_name(base_name, font_name):
+    """原始字体派生样式的名称，如 “PPT 正文 (Arial)”"""
+    return f'{base_name} ({font_name})'
+
+
+def text_tier(font_size):
+    """根据PPT字号确定Word中的层级：大标题 / 中标题 / 小标题 / 正文"""
+    if font_size >= 22:
+        return 'title'
+    if font_size >= 16:
+        return 'subtitle'
+    if font_size >= 13:
+        return 'heading'
+    return 'body'
+
+
+class DocxWriter:
+    """
+    使用 python-docx 对象模型写入 Word 文档
+    字号层级和原始字体都定义为命名段落样式，每种组合只创建一次，段落只引用样式名
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.doc = Document()
+        # 设置默认字体为微软雅黑，幻灯片标题在样式中居中
+        self.set_style_font(self.doc.styles['Normal'])
+        self.set_style_font(self.doc.styles['Heading 1'])
+        self.doc.styles['Heading 1'].paragraph_format.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+        self.set_style_font(self.doc.styles['Heading 2'])
+
+        self.tier_styles = {}
+        for tier, (style_id, name, size, bold) in TIER_STYLES.items():
+            if name is None:
+                self.tier_styles[tier] = self.doc.styles['Heading 2']
+                continue
+            style = self.doc.styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+            style.base_style = self.doc.styles['Normal']
+            style.quick_style = True
+            style.font.size = Pt(size)
+            style.font.bold = bold
+            self.tier_styles[tier] = style
+        # (层级, 字体) -> 派生样式，按需创建
+        self.font_styles = {}
+        section = self.doc.sections[0]
+        self.table_width = (section.page_width - section.left_margin - section.right_margin) // EMU_PER_TWIP
+
+    @staticmethod
+    def set_style_font(style, font_name=DEFAULT_FONT):
+        """设置样式字体（含东亚字体），并去掉模板中的主题字体以免覆盖"""
+        rfonts = style.element.get_or_add_rPr().get_or_add_rFonts()
+        rfonts.attrib.clear()
+        for attr in ('w:ascii', 'w:hAnsi', 'w:eastAsia'):
+            rfonts.set(qn(attr), font_name)
+
+    def paragraph_style(self, tier, font_name):
+        """返回层级样式；非默认字体使用以层级样式为基础的派生样式"""
+        if not font_name or font_name == DEFAULT_FONT:
+            return self.tier_styles[tier]
+        key = (tier, font_name)
+        style = self.font_styles.get(key)
+        if style is None:
+            base = self.tier_styles[tier]
+            style = self.doc.styles.add_style(font_style_name(base.name, font_name), WD_STYLE_TYPE.PARAGRAPH)
+            style.base_style = base
+            try:
+                self.set_style_font(style, str(font_name))
+            except Exception:
+                pass  # 忽略字体设置错误，沿用层级样式的默认字体
+            self.font_styles[key] = style
+        return style
+
+    def add_paragraph(self, text, style=None):
+        """
+        添加段落并直接写入 pStyle
+        python-docx 的 paragraph.style 每次赋值都会遍历整个样式表，段落多时开销很大
+        """
+        para = self.doc.add_paragraph(text)
+        if style is not None:
+            para._p.style = style.style_id
+        return para
+
+    def add_slide_heading(self, slide_num):
+        """添加幻灯片标题"""
+        self.add_paragraph(f'幻灯片 {slide_num}', self.doc.styles['Heading 1'])
+
+    def add_empty_notice(self):
+        self.doc.add_paragraph("【此页无文本内容】")
+
+    def add_box(self, box):
+        """写入一个文本框记录：表格写为 Word 表格，其余根据字号判断样式"""
+        if box.table is not None:
+            self.add_table(box.table)
+        else:
+            self.add_text(box.text, box.font_size, box.font_name)
+
+    def add_text(self, text, font_size, font_name=DEFAULT_FONT):
+        """根据字号判断样式写入一个文本框"""
+        self.add_paragraph(text, self.paragraph_style(text_tier(font_size), font_name))
+
+    def add_table(self, table):
+        """
+        写入 Word 表格：整张表格生成 XML 后一次插入正文，
+        不经过 python-docx 的逐单元格对象（cell.merge 等在大表格上开销很大）
+        """
+        xml = table_xml(table, self.table_width, self.tier_styles['body'].style_id,
+                        namespaces=f' {nsdecls("w")}')
+        self.doc.element.body._insert_tbl(parse_xml(xml))
+        # 相邻的表格在 Word 中会连成一张，表格后留一个空段落
+        self.doc.add_paragraph()
+
+    def add_page_break(self):
+        self.doc.add_page_break()
+
+    def close(self):
+        """保存文档"""
+        self.doc.save(self.output_path)
+
+
+class FastDocxWriter:
+    """
+    直接写入 WordprocessingML：不构建 python-docx 对象，段落 XML 逐段写入压缩包中的 document.xml
+    段落只引用 styles.xml 中的样式；原始字体的派生样式在写入过程中登记，关闭时统一写入 styles.xml
+    """
+
+    # 累积到该大小后再写入压缩流，减少小块压缩的开销
+    FLUSH_SIZE = 64 * 1024
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.zip = zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED)
+        self._buffer = []
+        self._buffered = 0
+        # (层级, 字体) -> 派生样式ID
+        self.font_styles = {}
+
+        with zipfile.ZipFile(TEMPLATE_PATH) as template:
+            document_xml = template.read('word/document.xml')
+            self._styles_xml = template.read('word/styles.xml')
+            for item in template.infolist():
+                if item.filename in ('word/document.xml', 'word/styles.xml'):
+                    continue
+                self.zip.writestr(item.filename, template.read(item.filename))
+
+        # 保留模板的命名空间声明和页面设置（sectPr），正文在二者之间流式写入
+        root = etree.fromstring(document_xml)
+        body = root.find(f'{{{NS_W}}}body')
+        sect_pr = body.find(f'{{{NS_W}}}sectPr')
+        body.remove(sect_pr)
+        body.text = None
+        head, tail = etree.tostring(root, encoding='unicode').split('<w:body/>')
+        self._footer = etree.tostring(sect_pr, encoding='unicode') + '</w:body>' + tail
+
+        # 版心宽度（twip），表格超出时等比缩小
+        w = f'{{{NS_W}}}'
+        page_width = int(sect_pr.find(f'{w}pgSz').get(f'{w}w'))
+        margins = sect_pr.find(f'{w}pgMar')
+        self.table_width = page_width - int(margins.get(f'{w}left')) - int(margins.get(f'{w}right'))
+
+        self.document = self.zip.open('word/document.xml', 'w')
+        self._write("<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n" + head + '<w:body>')
+
+    def _build_styles(self):
+        """在模板样式中设置默认字体，并添加各字号层级及原始字体的段落样式"""
+        root = etree.fromstring(self._styles_xml)
+        w = f'{{{NS_W}}}'
+
+        def set_fonts(style, font_name=DEFAULT_FONT):
+            rpr = style.find(f'{w}rPr')
+            if rpr is None:
+                rpr = etree.SubElement(style, f'{w}rPr')
+            rfonts = rpr.find(f'{w}rFonts')
+            if rfonts is None:
+                rfonts = etree.Element(f'{w}rFonts')
+                rpr.insert(0, rfonts)
+            rfonts.attrib.clear()
+            for attr in ('ascii', 'hAnsi', 'eastAsia'):
+                rfonts.set(f'{w}{attr}', font_name)
+            return rpr
+
+        def add_style(style_id, name, based_on):
+            style = etree.SubElement(root, f'{w}style', {f'{w}type': 'paragraph', f'{w}customStyle': '1',
+                                                        f'{w}styleId': style_id})
+            etree.SubElement(style, f'{w}name', {f'{w}val': name})
+            etree.SubElement(style, f'{w}basedOn', {f'{w}val': based_on})
+            return style
+
+        # 正文与标题样式统一使用微软雅黑，幻灯片标题居中
+        style_names = {}
+        for style in root.iterfind(f'{w}style'):
+            style_id = style.get(f'{w}styleId')
+            name = style.find(f'{w}name')
+            style_names[style_id] = name.get(f'{w}val') if name is not None else style_id
+            if style_id in ('Normal', 'Heading1', 'Heading2'):
+                set_fonts(style)
+            if style_id == 'Heading1':
+                ppr = style.find(f'{w}pPr')
+                if ppr is None:
+                    ppr = etree.Element(f'{w}pPr')
+                    style.insert(list(style).index(style.find(f'{w}rPr')), ppr)
+                # jc 在 pPr 中须位于 outlineLvl 之前
+                jc = etree.Element(f'{w}jc', {f'{w}val': 'center'})
+                outline = ppr.find(f'{w}outlineLvl')
+                if outline is not None:
+                    outline.addprevious(jc)
+                else:
+                    ppr.append(jc)
+
+        for style_id, name, size, bold in TIER_STYLES.values():
+            if name is None:
+                continue
+            style = add_style(style_id, name, 'Normal')
+            etree.SubElement(style, f'{w}qFormat')
+            rpr = set_fonts(style)
+            if bold:
+                etree.SubElement(rpr, f'{w}b')
+            etree.SubElement(rpr, f'{w}sz', {f'{w}val': str(size * 2)})
+            etree.SubElement(rpr, f'{w}szCs', {f'{w}val': str(size * 2)})
+            style_names[style_id] = name
+
+        for (tier, font_name), style_id in self.font_styles.items():
+            base_id = TIER_STYLES[tier][0]
+            style = add_style(style_id, font_style_name(style_names[base_id], font_name), base_id)
+            set_fonts(style, font_name)
+
+        return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+    def paragraph_style(self, tier, font_name):
+        """返回段落样式ID；非默认字体登记一个以层级样式为基础的派生样式"""
+        base_id = TIER_STYLES[tier][0]
+        if not font_name or font_name == DEFAULT_FONT:
+            return base_id
+        key = (tier, str(font_name))
+        style_id = self.font_styles.get(key)
+        if style_id is None:
+            style_id = self.font_styles[key] = f'{base_id}Font{len(self.font_styles) + 1}'
+        return style_id
+
+    def _write(self, xml):
+        self._buffer.append(xml)
+        self._buffered += len(xml)
+        if self._buffered >= self.FLUSH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        self.document.write(''.join(self._buffer).encode('utf-8'))
+        self._buffer = []
+        self._buffered = 0
+
+    def add_slide_heading(self, slide_num):
+        """添加幻灯片标题（一级标题样式中已设置居中）"""
+        self._write(f'<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr>{run_xml(f"幻灯片 {slide_num}")}</w:p>')
+
+    def add_empty_notice(self):
+        self._write(f'<w:p>{run_xml("【此页无文本内容】")}</w:p>')
+
+    def add_box(self, box):
+        """写入一个文本框记录：表格写为 Word 表格，其余根据字号判断样式"""
+        if box.table is not None:
+            self.add_table(box.table)
+        else:
+            self.add_text(box.text, box.font_size, box.font_name)
+
+    def add_text(self, text, font_size, font_name=DEFAULT_FONT):
+        """根据字号判断样式写入一个文本框"""
+        style_id = self.paragraph_style(text_tier(font_size), font_name)
+        self._write(f'<w:p><w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>{run_xml(text)}</w:p>')
+
+    def add_table(self, table):
+        """写入 Word 表格，单元格使用正文样式"""
+        # 相邻的表格在 Word 中会连成一张，表格后留一个空段落
+        self._write(table_xml(table, self.table_width, TIER_STYLES['body'][0]) + '<w:p/>')
+
+    def add_page_break(self):
+        self._write('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+
+    def close(self):
+        """写入页面设置和样式表并关闭压缩包"""
+        self._write(self._footer)
+        self._flush()
+        self.document.close()
+        self.zip.writestr('word/styles.xml', self._build_styles())
+        self.zip.close()
@@ -7,101 +7,757 @@ PPT智能文案提取工具 v4.0 - 终极版
 """
 
 from pptx import Presentation
-from docx import Document
-from docx.shared import Pt, RGBColor
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from docx.oxml.ns import qn
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from lxml import etree
+from docx_writer import DocxWriter, FastDocxWriter
+from text_writers import MarkdownWriter, PlainTextWriter, JsonLinesWriter, table_text
+from xy_cut import xy_cut_sort
+from boilerplate import BoilerplateFilter, find_boilerplate, DEFAULT_RATIO as BOILERPLATE_RATIO
+from collections import deque
+from operator import attrgetter
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import hashlib
+import io
+import json
+import logging
 import os
+import posixpath
+import re
+import sqlite3
 import sys
+import time
+import zipfile
+
+
+# 诊断输出统一走 logging：服务器默认不开启 DEBUG，逐形状的调试信息不会产生任何格式化开销
+logger = logging.getLogger(__name__)
+
+# PresentationML / DrawingML 命名空间
+NS_P = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+NS_A = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+NS_R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PKG_RELS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+NS_P14 = 'http://schemas.microsoft.com/office/powerpoint/2010/main'
+NSMAP = {'p': NS_P, 'a': NS_A, 'r': NS_R, 'p14': NS_P14}
+
+TAG_SP_TREE = f'{{{NS_P}}}spTree'
+TAG_SP = f'{{{NS_P}}}sp'
+TAG_GRP_SP = f'{{{NS_P}}}grpSp'
+TAG_GRP_SP_PR = f'{{{NS_P}}}grpSpPr'
+TAG_GRAPHIC_FRAME = f'{{{NS_P}}}graphicFrame'
+TAG_A_R = f'{{{NS_A}}}r'
+TAG_A_BR = f'{{{NS_A}}}br'
+TAG_A_FLD = f'{{{NS_A}}}fld'
+TAG_A_T = f'{{{NS_A}}}t'
+TAG_A_P = f'{{{NS_A}}}p'
+TAG_A_TR = f'{{{NS_A}}}tr'
+TAG_A_TC = f'{{{NS_A}}}tc'
+TAG_A_TX_BODY = f'{{{NS_A}}}txBody'
+
+# 版式占位符类型 -> 母版占位符类型（与 python-pptx 的继承规则一致）
+BASE_PLACEHOLDER_TYPES = {
+    'body': 'body', 'chart': 'body', 'clipArt': 'body', 'ctrTitle': 'title',
+    'dgm': 'body', 'dt': 'dt', 'ftr': 'ftr', 'media': 'body', 'obj': 'body',
+    'pic': 'body', 'sldNum': 'sldNum', 'subTitle': 'body', 'tbl': 'body',
+    'title': 'title',
+}
+
+# 列间距容差，约500px
+COLUMN_TOLERANCE = 500000
+
+# 备注作为位于 (0, NOTES_TOP) 的文本框写入。该位置在页面左上方约 2.8cm 处，
+# 列优先排序时备注归入最左一列并按该位置排序；xycut 切分前取出备注，排在页面最后
+NOTES_PREFIX = '【备注】'
+NOTES_TOP = 999999
+
+# 单页缓存的记录格式版本，文本框结构或排序规则变化时递增，使旧缓存失效
+SLIDE_CACHE_VERSION = 5
+DEFAULT_SLIDE_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'ppt-transfer', 'slides.sqlite3')
+
+# 页码范围中的一段："3"、"1-5"、"-5"、"12-"
+SLIDE_RANGE = re.compile(r'(\d*)\s*(-)?\s*(\d*)')
+
+# 未选中的幻灯片在 pptx 引擎中替换为空白页，不读取原有内容
+EMPTY_SLIDE_XML = (
+    f'<p:sld xmlns:a="{NS_A}" xmlns:r="{NS_R}" xmlns:p="{NS_P}"><p:cSld><p:spTree>'
+    '<p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr><p:grpSpPr/>'
+    '</p:spTree></p:cSld></p:sld>'
+).encode('utf-8')
+
+# 非法XML字符（保留换行和制表符）
+ILLEGAL_XML_CHARS = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
+
+
+def clean_text(text):
+    """清理文本中的非法XML字符"""
+    # 移除NULL字节和控制字符（保留换行和制表符）
+    return ILLEGAL_XML_CHARS.sub('', text)
+
+
+def parse_slide_ranges(spec):
+    """
+    解析页码范围（从 1 开始）："1-5,8,12-" -> [(1, 5), (8, 8), (12, None)]
+    "-5" 表示 1-5，"12-" 表示第 12 页到最后一页，"-" 表示全部页面；格式错误时抛出 ValueError
+    """
+    ranges = []
+    for part in spec.replace('，', ',').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        match = SLIDE_RANGE.fullmatch(part)
+        if not match:
+            raise ValueError(f"无效的页码范围: {part}")
+        start, dash, end = match.groups()
+        start = int(start) if start else 1
+        end = (int(end) if end else None) if dash else start
+        if start < 1 or (end is not None and end < start):
+            raise ValueError(f"无效的页码范围: {part}")
+        ranges.append((start, end))
+    if not ranges:
+        raise ValueError("页码范围为空")
+    return ranges
+
+
+def is_notes_box(box):
+    """TextBoxCollector.add_notes 写入的备注文本框"""
+    return box.left == 0 and box.top == NOTES_TOP
+
+
+class TextBox:
+    """
+    单个文本框记录（表格也是一个文本框，table 保存网格结构，普通文本框为 None）
+    使用 __slots__ 而不是字典：每页可能有上百个文本框，批量转换时创建和访问开销明显
+    """
+
+    __slots__ = ('text', 'left', 'top', 'font_size', 'font_name', 'width', 'height', 'table')
+
+    def __init__(self, text, left, top, font_size, font_name='微软雅黑', width=0, height=0, table=None):
+        self.text = text
+        self.left = left
+        self.top = top
+        self.font_size = font_size
+        self.font_name = font_name
+        self.width = width
+        self.height = height
+        self.table = table
+
+    def __repr__(self):
+        return f"TextBox({self.text[:20]!r}, left={self.left}, top={self.top}, font_size={self.font_size})"
+
+    def to_json(self):
+        """按 __slots__ 顺序转为列表，用于单页缓存"""
+        return [self.text, self.left, self.top, self.font_size, self.font_name,
+                self.width, self.height, self.table]
+
+    @classmethod
+    def from_json(cls, values):
+        return cls(*values)
+
+
+class TextBoxCollector:
+    """收集单页文本框，按位置和内容自动去重"""
+
+    def __init__(self):
+        self.text_boxes = []
+        self.processed_texts = set()
+
+    def add(self, text, left, top, font_size, font_name='微软雅黑', width=0, height=0):
+        """添加文本框，自动去重"""
+        if not text:
+            return
+
+        # 空白文本清理后同样为空，只需判断一次
+        text = clean_text(text.strip())
+        if not text:
+            return
+
+        # 使用位置和文本内容作为唯一标识
+        unique_key = (int(left), int(top), text[:100])
+
+        if unique_key not in self.processed_texts:
+            self.processed_texts.add(unique_key)
+            self.text_boxes.append(TextBox(text, left, top, font_size, font_name, width, height))
+
+    def add_table(self, table, left, top, font_name='微软雅黑'):
+        """添加整张表格作为一个文本框，text 为表格的纯文本形式，table 保存网格结构"""
+        text = table_text(table)
+        unique_key = (int(left), int(top), text[:100])
+        if unique_key in self.processed_texts:
+            return
+        self.processed_texts.add(unique_key)
+        self.text_boxes.append(TextBox(text, left, top, 11.0, font_name,
+                                       sum(table['columns']), sum(table['row_heights']), table))
+
+    def add_notes(self, notes_text, prefix=NOTES_PREFIX):
+        """添加演讲备注，位于 (0, NOTES_TOP)，排序时的位置见 NOTES_TOP 的说明"""
+        notes_text = notes_text.strip()
+        if notes_text:
+            self.add(f"{prefix}{notes_text}", 0, NOTES_TOP, 11.0)
+
+
+def read_xfrm(elem):
+    """读取形状的 (x, y, cx, cy)，没有位置信息时返回 None"""
+    xfrm = elem.find('p:spPr/a:xfrm', NSMAP)
+    if xfrm is None:
+        xfrm = elem.find('p:xfrm', NSMAP)
+    if xfrm is None:
+        xfrm = elem.find('p:grpSpPr/a:xfrm', NSMAP)
+    if xfrm is None:
+        return None
+    off = xfrm.find('a:off', NSMAP)
+    if off is None:
+        return None
+    ext = xfrm.find('a:ext', NSMAP)
+    cx = int(ext.get('cx', 0)) if ext is not None else 0
+    cy = int(ext.get('cy', 0)) if ext is not None else 0
+    return int(off.get('x', 0)), int(off.get('y', 0)), cx, cy
+
+
+# 不在组合内的形状的坐标变换 (sx, sy, tx, ty)
+IDENTITY_TRANSFORM = (1.0, 1.0, 0, 0)
+
+
+def group_transform(grp_sp_pr, parent=IDENTITY_TRANSFORM):
+    """
+    组合形状的坐标变换 (sx, sy, tx, ty)：子形状的绝对坐标 = 子坐标 * s + t
+    子形状坐标位于 a:chOff / a:chExt 描述的子坐标空间，映射到组合自身的 a:off / a:ext；parent 为外层组合的变换
+    """
+    psx, psy, ptx, pty = parent
+    sx = sy = 1.0
+    tx = ty = 0
+    xfrm = grp_sp_pr.find('a:xfrm', NSMAP) if grp_sp_pr is not None else None
+    if xfrm is not None:
+        off = xfrm.find('a:off', NSMAP)
+        ext = xfrm.find('a:ext', NSMAP)
+        ch_off = xfrm.find('a:chOff', NSMAP)
+        ch_ext = xfrm.find('a:chExt', NSMAP)
+        ox = int(off.get('x', 0)) if off is not None else 0
+        oy = int(off.get('y', 0)) if off is not None else 0
+        cox = int(ch_off.get('x', 0)) if ch_off is not None else 0
+        coy = int(ch_off.get('y', 0)) if ch_off is not None else 0
+        if ext is not None and ch_ext is not None:
+            if int(ch_ext.get('cx', 0)):
+                sx = int(ext.get('cx', 0)) / int(ch_ext.get('cx'))
+            if int(ch_ext.get('cy', 0)):
+                sy = int(ext.get('cy', 0)) / int(ch_ext.get('cy'))
+        tx, ty = ox - cox * sx, oy - coy * sy
+    return psx * sx, psy * sy, psx * tx + ptx, psy * ty + pty
+
+
+def read_placeholder(elem):
+    """读取形状的占位符信息 (type, idx)，非占位符返回 None"""
+    ph = elem.find('./*/p:nvPr/p:ph', NSMAP)
+    if ph is None:
+        return None
+    return ph.get('type', 'obj'), int(ph.get('idx', 0))
+
+
+def paragraph_text(p):
+    """段落文本：拼接 run / field，换行符记为 \\v（与 python-pptx 一致）"""
+    parts = []
+    for child in p:
+        if child.tag == TAG_A_BR:
+            parts.append('\v')
+        elif child.tag == TAG_A_R or child.tag == TAG_A_FLD:
+            t = child.find(TAG_A_T)
+            if t is not None and t.text:
+                parts.append(t.text)
+    return ''.join(parts)
+
+
+def text_body_text(tx_body):
+    """文本框全部文本，段落之间以换行分隔"""
+    return '\n'.join(paragraph_text(p) for p in tx_body.iterchildren(TAG_A_P))
+
+
+def notes_body_text(root):
+    """备注页（p:notes）中正文占位符的文本，没有正文占位符时返回空字符串"""
+    sp_tree = root.find('p:cSld/p:spTree', NSMAP)
+    if sp_tree is None:
+        return ''
+    for elem in sp_tree:
+        ph = read_placeholder(elem)
+        if ph and ph[0] == 'body':
+            tx_body = elem.find('p:txBody', NSMAP)
+            return text_body_text(tx_body) if tx_body is not None else ''
+    return ''
+
+
+def slide_notes_text(slide):
+    """
+    pptx 引擎：读取已存在的备注页正文
+    不能访问 slide.notes_slide：没有备注页时它会新建备注页（和备注母版）部件，
+    这里先检查备注关系，再直接解析已加载的备注页 XML
+    """
+    if not slide.has_notes_slide:
+        return ''
+    return notes_body_text(slide.part.part_related_by(RT.NOTES_SLIDE)._element)
+
+
+def is_merged_continuation(tc):
+    """单元格是否被左侧（hMerge）或上方（vMerge）的合并单元格覆盖"""
+    return tc.get('hMerge') in ('1', 'true') or tc.get('vMerge') in ('1', 'true')
+
+
+def read_table(tbl):
+    """
+    直接读取 a:tbl 网格，返回结构化表格，全部单元格为空时返回 None：
+    {'columns': [a:gridCol 宽度(EMU)], 'row_heights': [行高(EMU)],
+     'rows': [[{'text', 'col_span', 'row_span'} 或 None（被合并覆盖的单元格）]]}
+    """
+    columns = [int(col.get('w', 0)) for col in tbl.iterfind('a:tblGrid/a:gridCol', NSMAP)]
+    row_heights = []
+    rows = []
+    has_text = False
+    # 单元格数量可能上千，直接按完整标签名查找子元素，省去前缀路径解析
+    for tr in tbl.iterchildren(TAG_A_TR):
+        row_heights.append(int(tr.get('h', 0)))
+        row = []
+        for tc in tr.iterchildren(TAG_A_TC):
+            if is_merged_continuation(tc):
+                row.append(None)
+                continue
+            tx_body = tc.find(TAG_A_TX_BODY)
+            text = clean_text(text_body_text(tx_body).strip()) if tx_body is not None else ''
+            has_text = has_text or bool(text)
+            row.append({
+                'text': text,
+                'col_span': int(tc.get('gridSpan', 1)),
+                'row_span': int(tc.get('rowSpan', 1)),
+            })
+        rows.append(row)
+    if not has_text:
+        return None
+    return {'columns': columns, 'row_heights': row_heights, 'rows': rows}
+
+
+def is_text_part(name):
+    """
+    文本提取需要的部件：所有 XML 部件（幻灯片、版式、母版、备注、主题等）和关系文件
+    图片、音视频、嵌入对象（OLE / 工作簿）、嵌入字体、缩略图、宏等二进制部件都不需要
+    """
+    return name.endswith('.xml') or name.endswith('.rels')
+
+
+def load_text_only(ppt_path, reader=None, slide_indices=None):
+    """
+    只加载文本相关部件的 Presentation
+    python-pptx 打开文件时会读取并解压全部部件；这里先在内存中组装一个只含 XML 部件和关系的副本，
+    二进制部件保留为空内容（不读取、不解压），关系照常解析，幻灯片、版式/母版（占位符继承）、
+    备注和表格的访问方式不变
+    指定 slide_indices 时（需要 reader）只复制选中幻灯片可达的部件，其余幻灯片替换为空白页，
+    prs.slides 的页数和索引不变，加载耗时与选中的页数成正比
+    """
+    skipped = set()
+    if slide_indices is not None:
+        partnames, skipped = reader.text_partnames([reader.slide_partnames[i] for i in slide_indices])
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(ppt_path) as src, zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as dst:
+        for item in src.infolist():
+            name = item.filename
+            if item.is_dir():
+                continue
+            if slide_indices is not None:
+                if name.endswith('.rels'):
+                    # 只保留被遍历到的部件的关系（包关系的源部件为 ''）
+                    base_dir, rels_name = posixpath.split(name)
+                    source = posixpath.join(posixpath.dirname(base_dir), rels_name[:-len('.rels')])
+                    if source and (source not in partnames or source in skipped):
+                        continue
+                elif name in skipped:
+                    dst.writestr(name, EMPTY_SLIDE_XML)
+                    continue
+                elif name not in partnames and name != '[Content_Types].xml':
+                    continue
+            dst.writestr(name, src.read(name) if is_text_part(name) else b'')
+    buffer.seek(0)
+    return Presentation(buffer)
+
+
+class SlideCache:
+    """
+    单页结果缓存（SQLite）
+    以幻灯片 XML 及其备注、版式、母版部件的内容哈希为键，保存排序后的文本框列表，
+    重复上传只改动了少数页的文件时，其余页直接复用
+    """
+
+    def __init__(self, path, max_entries=200000):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.max_entries = max_entries
+        # 自动提交模式 + WAL：查询不开启写事务，多个进程（Web 服务的并发任务、批量转换的子进程）
+        # 共用同一数据库时读取互不阻塞，写入只在 commit() 中短暂持有锁
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS slides ('
+            'key TEXT PRIMARY KEY, text_boxes TEXT NOT NULL, last_used REAL NOT NULL)'
+        )
+        # 待写入的新条目 {key: JSON} 和命中的条目 {key: 访问时间}，在 commit() 中一次写入
+        self.pending = {}
+        self.touched = {}
+
+    def get(self, key):
+        data = self.pending.get(key)
+        if data is None:
+            row = self.conn.execute('SELECT text_boxes FROM slides WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            data = row[0]
+            self.touched[key] = time.time()
+        return [TextBox.from_json(values) for values in json.loads(data)]
+
+    def put(self, key, text_boxes):
+        self.pending[key] = json.dumps([box.to_json() for box in text_boxes], ensure_ascii=False)
+
+    def commit(self):
+        """在一个短事务中写入新条目和访问时间，并淘汰超出容量的最久未使用条目"""
+        if not self.pending and not self.touched:
+            return
+        now = time.time()
+        with self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            self.conn.executemany('UPDATE slides SET last_used = ? WHERE key = ?',
+                                  [(used, key) for key, used in self.touched.items()])
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO slides (key, text_boxes, last_used) VALUES (?, ?, ?)',
+                [(key, data, now) for key, data in self.pending.items()]
+            )
+            if self.pending:
+                self.conn.execute(
+                    'DELETE FROM slides WHERE key IN '
+                    '(SELECT key FROM slides ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+        self.pending.clear()
+        self.touched.clear()
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+class PptxPackageReader:
+    """
+    直接读取 .pptx 压缩包中的 XML 部件
+    不构建 python-pptx 的对象模型，供 xml 提取引擎使用
+    """
 
-class SmartPPTExtractor:
     def __init__(self, ppt_path):
+        self.zip = zipfile.ZipFile(ppt_path)
+        self._rels_cache = {}
+        self._part_digests = {}
+        self._layout_placeholders = {}
+        self._master_placeholders = {}
+        self.slide_partnames, self.sections = self._read_presentation()
+
+    def close(self):
+        self.zip.close()
+
+    def open(self, partname):
+        return self.zip.open(partname)
+
+    def rels(self, partname):
+        """返回部件的关系列表 [(rId, reltype, target_partname)]"""
+        if partname in self._rels_cache:
+            return self._rels_cache[partname]
+
+        base_dir, base_name = posixpath.split(partname)
+        rels_name = posixpath.join(base_dir, '_rels', f'{base_name}.rels')
+        rels = []
         try:
-            print(f"📂 正在打开文件: {ppt_path}")
-            self.prs = Presentation(ppt_path)
-            print(f"✅ 文件打开成功，共 {len(self.prs.slides)} 页")
-            self.doc = Document()
-            # 设置默认字体为微软雅黑
-            self.doc.styles['Normal'].font.name = '微软雅黑'
-            self.doc.styles['Normal']._element.rPr.rFonts.set(qn('w:eastAsia'), '微软雅黑')
+            root = etree.fromstring(self.zip.read(rels_name))
+        except KeyError:
+            root = None
+        if root is not None:
+            for rel in root.iterfind(f'{{{NS_PKG_RELS}}}Relationship'):
+                if rel.get('TargetMode') == 'External':
+                    continue
+                target = posixpath.normpath(posixpath.join(base_dir, rel.get('Target')))
+                rels.append((rel.get('Id'), rel.get('Type', ''), target.lstrip('/')))
+        self._rels_cache[partname] = rels
+        return rels
+
+    def related(self, partname, reltype_suffix):
+        """按关系类型查找第一个目标部件"""
+        for _, reltype, target in self.rels(partname):
+            if reltype.endswith(reltype_suffix):
+                return target
+        return None
+
+    def part_digest(self, partname):
+        """部件内容的 SHA-256 摘要"""
+        if partname not in self._part_digests:
+            self._part_digests[partname] = hashlib.sha256(self.zip.read(partname)).digest()
+        return self._part_digests[partname]
+
+    def slide_fingerprint(self, slide_partname):
+        """幻灯片内容指纹：幻灯片、备注页、版式、母版部件（占位符位置可能继承自后两者）"""
+        layout = self.related(slide_partname, '/slideLayout')
+        master = self.related(layout, '/slideMaster') if layout else None
+        notes = self.related(slide_partname, '/notesSlide')
+        digest = hashlib.sha256()
+        for partname in (slide_partname, notes, layout, master):
+            digest.update(self.part_digest(partname) if partname else b'-')
+        return digest.hexdigest()
+
+    def _read_presentation(self):
+        """
+        读取 presentation.xml：按 sldIdLst 顺序的幻灯片部件名，
+        以及扩展列表中 p14:sectionLst 定义的节 [(节名, [幻灯片索引])]（没有分节时为空列表）
+        """
+        root = etree.fromstring(self.zip.read('ppt/presentation.xml'))
+        targets = {rid: target for rid, _, target in self.rels('ppt/presentation.xml')}
+        partnames = []
+        slide_ids = {}
+        for sld_id in root.iterfind('p:sldIdLst/p:sldId', NSMAP):
+            target = targets.get(sld_id.get(f'{{{NS_R}}}id'))
+            if target:
+                slide_ids[sld_id.get('id')] = len(partnames)
+                partnames.append(target)
+
+        sections = []
+        for section in root.iterfind('p:extLst/p:ext/p14:sectionLst/p14:section', NSMAP):
+            indices = [slide_ids[sld_id.get('id')]
+                       for sld_id in section.iterfind('p14:sldIdLst/p14:sldId', NSMAP)
+                       if sld_id.get('id') in slide_ids]
+            sections.append((section.get('name', ''), indices))
+        return partnames, sections
+
+    def text_partnames(self, slide_partnames):
+        """
+        只加载部分幻灯片时需要的部件：从包关系开始遍历关系图，
+        未选中的幻灯片只保留部件本身（替换为空白页），不再遍历其版式、备注、图片等关系
+        """
+        skipped = set(self.slide_partnames).difference(slide_partnames)
+        partnames = set()
+        stack = ['']
+        while stack:
+            for _, _, target in self.rels(stack.pop()):
+                if target not in partnames:
+                    partnames.add(target)
+                    if target not in skipped:
+                        stack.append(target)
+        return partnames, skipped
+
+    def _placeholders(self, partname):
+        """读取版式/母版 spTree 中的占位符 [(type, idx, xfrm)]"""
+        root = etree.fromstring(self.zip.read(partname))
+        sp_tree = root.find('p:cSld/p:spTree', NSMAP)
+        placeholders = []
+        if sp_tree is not None:
+            for elem in sp_tree:
+                ph = read_placeholder(elem)
+                if ph:
+                    placeholders.append((ph[0], ph[1], read_xfrm(elem)))
+        return placeholders
+
+    def inherited_xfrm(self, slide_partname, ph_idx):
+        """幻灯片占位符没有位置时，依次从版式、母版继承位置"""
+        layout = self.related(slide_partname, '/slideLayout')
+        if not layout:
+            return None
+        if layout not in self._layout_placeholders:
+            self._layout_placeholders[layout] = self._placeholders(layout)
+
+        for ph_type, idx, xfrm in self._layout_placeholders[layout]:
+            if idx != ph_idx:
+                continue
+            if xfrm is not None:
+                return xfrm
+            master = self.related(layout, '/slideMaster')
+            base_type = BASE_PLACEHOLDER_TYPES.get(ph_type)
+            if not master or not base_type:
+                return None
+            if master not in self._master_placeholders:
+                self._master_placeholders[master] = self._placeholders(master)
+            for master_type, _, master_xfrm in self._master_placeholders[master]:
+                if master_type == base_type:
+                    return master_xfrm
+            return None
+        return None
+
+    def notes_text(self, slide_partname):
+        """读取已存在的备注页正文，没有备注页时返回空字符串"""
+        notes = self.related(slide_partname, '/notesSlide')
+        if not notes:
+            return ''
+        return notes_body_text(etree.fromstring(self.zip.read(notes)))
+
+
+class SmartPPTExtractor:
+    ENGINES = ('pptx', 'xml')
+    # 阅读顺序：columns 为列优先排序，xycut 为 XY-cut 递归切分（同时处理分栏和多行网格）
+    LAYOUTS = ('columns', 'xycut')
+    WRITERS = {'docx': DocxWriter, 'xml': FastDocxWriter}
+    # 输出格式 -> (文件扩展名, 写入器)，Word 格式的写入器由 writer 选项决定
+    OUTPUT_FORMATS = {
+        'docx': ('.docx', None),
+        'md': ('.md', MarkdownWriter),
+        'txt': ('.txt', PlainTextWriter),
+        'jsonl': ('.jsonl', JsonLinesWriter),
+    }
+    # 跨页重复内容（页眉页脚等）：keep 原样保留，once 只保留第一次出现，drop 全部省略
+    BOILERPLATE_MODES = ('keep', 'once', 'drop')
+
+    def __init__(self, ppt_path, engine='pptx', slide_cache=None, writer='docx', low_memory=False,
+                 output_format='docx', layout='columns', boilerplate='keep', boilerplate_ratio=BOILERPLATE_RATIO,
+                 notes_only=False, slides=None, sections=None):
+        """
+        engine: 'pptx' 使用 python-pptx 对象模型逐个形状提取；
+                'xml' 直接流式解析压缩包中的幻灯片 XML，速度更快
+        slide_cache: 单页缓存数据库路径，内容未变化的页直接复用上次的提取结果
+        writer: 'docx' 使用 python-docx 构建文档；'xml' 直接流式写入 document.xml
+        low_memory: 低内存模式，固定使用 xml 引擎 + xml 写入器：
+                    只读取压缩包目录和用到的 XML 部件，从不加载图片/视频等媒体部件；
+                    每页解析完即释放 XML，Word 文档边生成边写入磁盘。
+                    峰值内存与文件大小、页数基本无关（1GB 含媒体的 100 页文件约 50MB）
+        output_format: 输出格式，'docx'（Word）、'md'（Markdown）、'txt'（纯文本）
+                       或 'jsonl'（每个文本框一行 JSON，带坐标和字体）；非 Word 格式直接流式写入输出文件
+        layout: 阅读顺序，'columns' 为列优先排序（固定列间距容差）；
+                'xycut' 在文本框投影的空白处递归切分行和列，卡片网格等多行布局按行阅读
+        boilerplate: 跨页重复内容的处理方式，'keep' 原样保留；'once' 只保留第一次出现；'drop' 全部省略。
+                     不为 'keep' 时先提取全部页面，把同一位置、同一文本（忽略数字差异）出现在
+                     超过 boilerplate_ratio 比例页面上的文本框视为页眉、页脚、页码等模板内容
+        notes_only: 只导出演讲备注（讲稿），每页一段，不解析幻灯片上的形状。
+                    固定使用 xml 引擎（两种引擎的备注解析相同），只读取已存在的备注页部件；
+                    读取备注比计算单页缓存的指纹更快，因此不使用单页缓存
+        slides: 只提取部分页面，页码范围字符串（"1-5,8,12-"）或页码列表，从 1 开始
+        sections: 只提取这些节（PowerPoint 中的「新增节」）中的页面，与 slides 取并集。
+                  只读取选中页面的部件，耗时与选中的页数成正比；输出中的页码仍为原始页码
+        """
+        if low_memory:
+            engine = writer = 'xml'
+        if notes_only:
+            engine = 'xml'
+            slide_cache = None
+        if engine not in self.ENGINES:
+            raise ValueError(f"未知的提取引擎: {engine}")
+        if writer not in self.WRITERS:
+            raise ValueError(f"未知的文档写入器: {writer}")
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(f"未知的输出格式: {output_format}")
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"未知的阅读顺序: {layout}")
+        if boilerplate not in self.BOILERPLATE_MODES:
+            raise ValueError(f"未知的重复内容处理方式: {boilerplate}")
+        if not 0 <= boilerplate_ratio < 1:
+            raise ValueError(f"重复内容的页面比例需在 0 到 1 之间: {boilerplate_ratio}")
+        self.engine = engine
+        self.writer = writer
+        self.output_format = output_format
+        self.layout = layout
+        self.boilerplate = boilerplate
+        self.boilerplate_ratio = boilerplate_ratio
+        self.notes_only = notes_only
+        # 识别出的模板内容种数和省略的文本框数
+        self.boilerplate_found = 0
+        self.boilerplate_removed = 0
+        self.low_memory = low_memory
+        self.ppt_path = ppt_path
+        self.prs = None
+        self.reader = None
+        self.slide_cache = None
+        self.cache_hits = 0
+        # 页索引 -> {'parse': 秒, 'sort': 秒, 'cached': 是否复用缓存}，写入耗时由导出流程补充
+        self.slide_timings = {}
+        # 选中页面的索引（从 0 开始）；None 表示全部页面
+        self.selected = None
+        start = time.perf_counter()
+        try:
+            logger.info("📂 正在打开文件: %s", ppt_path)
+            if engine == 'xml' or slide_cache or slides is not None or sections:
+                # 单页缓存需要读取部件内容计算指纹；选择页面需要读取页面列表和分节
+                self.reader = PptxPackageReader(ppt_path)
+            if slides is not None or sections:
+                self.selected = self.select_slides(slides, sections)
+            if engine == 'xml':
+                self.total_slides = len(self.reader.slide_partnames)
+            else:
+                self.prs = load_text_only(ppt_path, self.reader, self.selected)
+                self.total_slides = len(self.prs.slides)
+            self.slide_indices = self.selected if self.selected is not None else range(self.total_slides)
+            self.slide_count = len(self.slide_indices)
+            if slide_cache:
+                self.slide_cache = SlideCache(slide_cache)
+            self.open_seconds = time.perf_counter() - start
+            if self.selected is not None:
+                logger.info("✅ 文件打开成功，共 %d 页，选中 %d 页", self.total_slides, self.slide_count)
+            else:
+                logger.info("✅ 文件打开成功，共 %d 页", self.slide_count)
         except Exception as e:
-            print(f"❌ 无法打开PPT文件: {str(e)}")
+            logger.error("❌ 无法打开PPT文件: %s", e)
             raise
+
+    def select_slides(self, slides=None, sections=None):
+        """把页码范围和节名解析为按顺序排列的页索引（从 0 开始）；页码超出范围或节不存在时抛出 ValueError"""
+        total = len(self.reader.slide_partnames)
+        selected = set()
+        if slides is not None:
+            if isinstance(slides, str):
+                ranges = parse_slide_ranges(slides)
+            else:
+                ranges = [(number, number) for number in slides]
+            for start, end in ranges:
+                if start < 1 or start > total or (end is not None and end > total):
+                    raise ValueError(f"页码超出范围（共 {total} 页）: {start if end is None else end}")
+                selected.update(range(start - 1, total if end is None else end))
+        if sections:
+            indices = dict(self.reader.sections)
+            for name in sections:
+                if name not in indices:
+                    available = '、'.join(section for section, _ in self.reader.sections) or '无'
+                    raise ValueError(f"找不到节: {name}（可选: {available}）")
+                selected.update(indices[name])
+        if not selected:
+            raise ValueError("没有选中任何页面")
+        return sorted(selected)
         
     def extract_all_texts_aggressive(self, slide):
         """
         超级激进提取：不遗漏任何文本
         """
-        text_boxes = []
-        processed_texts = set()  # 用于去重
-
-        def clean_text(text):
-            """清理文本中的非法XML字符"""
-            import re
-            # 移除NULL字节和控制字符（保留换行和制表符）
-            text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', text)
-            return text
-
-        def add_text_box(text, left, top, font_size, font_name='微软雅黑', width=0, height=0):
-            """添加文本框，自动去重"""
-            if not text or len(text.strip()) == 0:
-                return
-
-            text = clean_text(text.strip())
-            if not text:
-                return
+        collector = TextBoxCollector()
+        add_text_box = collector.add
+        debug = logger.isEnabledFor(logging.DEBUG)
 
-            # 使用位置和文本内容作为唯一标识
-            unique_key = f"{int(left)}_{int(top)}_{text[:100]}"
-
-            if unique_key not in processed_texts:
-                processed_texts.add(unique_key)
-                text_boxes.append({
-                    'text': text,
-                    'left': left,
-                    'top': top,
-                    'font_size': font_size,
-                    'font_name': font_name,
-                    'width': width,
-                    'height': height,
-                })
-
-        def get_position(shape, parent_left=0, parent_top=0):
-            """获取形状位置"""
+        def get_position(shape, transform):
+            """获取形状在幻灯片上的位置和大小 (left, top, width, height)，组合内的形状按组合的坐标变换换算"""
             try:
-                left = parent_left + (shape.left if hasattr(shape, 'left') and shape.left else 0)
-                top = parent_top + (shape.top if hasattr(shape, 'top') and shape.top else 0)
-                return left, top
+                left = shape.left if hasattr(shape, 'left') and shape.left else 0
+                top = shape.top if hasattr(shape, 'top') and shape.top else 0
+                width = shape.width if hasattr(shape, 'width') and shape.width else 0
+                height = shape.height if hasattr(shape, 'height') and shape.height else 0
             except:
-                return parent_left, parent_top
+                left = top = width = height = 0
+            sx, sy, tx, ty = transform
+            return round(left * sx + tx), round(top * sy + ty), round(width * sx), round(height * sy)
 
-        def extract_from_shape(shape, parent_left=0, parent_top=0):
+        def extract_from_shape(shape, transform=IDENTITY_TRANSFORM):
             """递归提取所有文本 - 绝不遗漏"""
             try:
-                left, top = get_position(shape, parent_left, parent_top)
+                left, top, width, height = get_position(shape, transform)
 
-                # 1. 处理组合形状 - 递归处理所有子形状
+                # 1. 处理组合形状 - 递归处理所有子形状（子形状坐标位于组合的子坐标空间）
                 if hasattr(shape, 'shape_type') and shape.shape_type == 6:  # msoGroup
                     if hasattr(shape, 'shapes'):
+                        group = group_transform(shape._element.find('p:grpSpPr', NSMAP), transform)
                         for sub_shape in shape.shapes:
-                            extract_from_shape(sub_shape, left, top)
+                            extract_from_shape(sub_shape, group)
                     return
 
-                # 2. 表格 - 优先处理
+                # 2. 表格 - 优先处理：直接读取 a:tbl 网格，不创建逐单元格的代理对象
                 if hasattr(shape, 'has_table'):
                     try:
-                        if shape.has_table and hasattr(shape, 'table'):
-                            table = shape.table
-                            for row_idx, row in enumerate(table.rows):
-                                for col_idx, cell in enumerate(row.cells):
-                                    cell_text = cell.text.strip()
-                                    if cell_text:
-                                        cell_top = top + (row_idx * 300000)
-                                        cell_left = left + (col_idx * 300000)
-                                        add_text_box(cell_text, cell_left, cell_top, 11.0, 0, 0)
+                        if shape.has_table:
+                            tbl = shape._element.find('a:graphic/a:graphicData/a:tbl', NSMAP)
+                            table = read_table(tbl)
+                            if table:
+                                collector.add_table(table, left, top)
                             return
                     except Exception as e:
-                        print(f"      表格提取错误: {str(e)}")
+                        logger.warning("      表格提取错误: %s", e)
 
                 # 3. text_frame - 主要提取方法
                 extracted_text = None
@@ -129,7 +785,7 @@ class SmartPPTExtractor:
                             if all_text:
                                 extracted_text = '\n'.join(all_text)
                     except Exception as e:
-                        print(f"      text_frame提取错误: {str(e)}")
+                        logger.warning("      text_frame提取错误: %s", e)
 
                 # 4. 直接text属性（备用）
                 if not extracted_text and hasattr(shape, 'text'):
@@ -138,296 +794,624 @@ class SmartPPTExtractor:
                         if direct_text:
                             extracted_text = direct_text
                     except Exception as e:
-                        print(f"      text属性提取错误: {str(e)}")
+                        logger.warning("      text属性提取错误: %s", e)
 
                 # 5. 如果提取到文本，添加到列表
                 if extracted_text:
-                    width = shape.width if hasattr(shape, 'width') else 0
-                    height = shape.height if hasattr(shape, 'height') else 0
                     add_text_box(extracted_text, left, top, font_size, font_name, width, height)
-                    print(f"      ✓ 提取到文本: {extracted_text[:30]}...")
-                else:
-                    print(f"      ✗ 未提取到文本")
+                    if debug:
+                        logger.debug("      ✓ 提取到文本: %s...", extracted_text[:30])
+                elif debug:
+                    logger.debug("      ✗ 未提取到文本")
 
             except Exception as e:
-                print(f"      💥 形状处理异常: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.warning("      💥 形状处理异常: %s", e, exc_info=debug)
 
         # 遍历所有形状
         try:
             shapes_list = list(slide.shapes)
-            print(f"  🔍 幻灯片共有 {len(shapes_list)} 个形状对象")
+            logger.debug("  🔍 幻灯片共有 %d 个形状对象", len(shapes_list))
 
             for idx, shape in enumerate(shapes_list, 1):
-                # 调试：显示每个形状的信息
-                shape_info = f"形状{idx}"
-                try:
-                    if hasattr(shape, 'shape_type'):
-                        shape_info += f" 类型:{shape.shape_type}"
-                    if hasattr(shape, 'name'):
-                        shape_info += f" 名称:{shape.name}"
-                except:
-                    pass
-                print(f"    处理 {shape_info}")
+                # 调试：显示每个形状的信息（只在调试级别下访问额外属性）
+                if debug:
+                    shape_info = f"形状{idx}"
+                    try:
+                        if hasattr(shape, 'shape_type'):
+                            shape_info += f" 类型:{shape.shape_type}"
+                        if hasattr(shape, 'name'):
+                            shape_info += f" 名称:{shape.name}"
+                    except:
+                        pass
+                    logger.debug("    处理 %s", shape_info)
 
                 extract_from_shape(shape)
         except Exception as e:
-            print(f"    ⚠️ 提取形状时出错: {str(e)}")
+            logger.warning("    ⚠️ 提取形状时出错: %s", e)
 
-        # 提取幻灯片备注
+        # 提取幻灯片备注（只读取已存在的备注页）
         try:
-            if hasattr(slide, 'notes_slide') and slide.notes_slide:
-                notes_text_frame = slide.notes_slide.notes_text_frame
-                if notes_text_frame and notes_text_frame.text:
-                    notes_text = notes_text_frame.text.strip()
-                    if notes_text:
-                        add_text_box(f"【备注】{notes_text}", 0, 999999, 11.0)
-        except:
-            pass
+            collector.add_notes(slide_notes_text(slide))
+        except Exception as e:
+            logger.warning("    ⚠️ 提取备注时出错: %s", e)
+
+        return collector.text_boxes
+
+    def extract_all_texts_xml(self, slide_partname):
+        """
+        流式解析幻灯片 XML 提取文本，输出与 extract_all_texts_aggressive 相同的文本框记录
+        组合形状按 a:off / a:chOff / a:ext / a:chExt 换算到幻灯片坐标
+        """
+        collector = TextBoxCollector()
+        reader = self.reader
+        # 组合形状的坐标变换栈：(组合元素, sx, sy, tx, ty)，绝对坐标 = 子坐标 * s + t
+        transforms = [(None,) + IDENTITY_TRANSFORM]
+        shape_count = 0
+
+        def in_shape_tree(elem):
+            parent = elem.getparent()
+            return parent is not None and (parent.tag == TAG_SP_TREE or parent is transforms[-1][0])
+
+        def position(elem):
+            xfrm = read_xfrm(elem)
+            if xfrm is None:
+                ph = read_placeholder(elem)
+                if ph:
+                    xfrm = reader.inherited_xfrm(slide_partname, ph[1])
+            if xfrm is None:
+                xfrm = (0, 0, 0, 0)
+            _, sx, sy, tx, ty = transforms[-1]
+            x, y, cx, cy = xfrm
+            return round(x * sx + tx), round(y * sy + ty), round(cx * sx), round(cy * sy)
+
+        def extract_table(elem):
+            # a:tbl 只在函数内引用：释放元素时若仍有指向子树的 Python 对象，
+            # lxml 会逐个节点迁移整棵子树而不是直接释放，大表格上开销很大
+            tbl = elem.find('a:graphic/a:graphicData/a:tbl', NSMAP)
+            table = read_table(tbl) if tbl is not None else None
+            if table:
+                left, top, _, _ = position(elem)
+                collector.add_table(table, left, top)
+
+        def extract_sp(elem):
+            tx_body = elem.find('p:txBody', NSMAP)
+            if tx_body is None:
+                return
+            all_text = []
+            font_size = 12.0
+            font_name = '微软雅黑'  # 默认字体
+            for p in tx_body.iterfind('a:p', NSMAP):
+                para_text = paragraph_text(p).strip()
+                if not para_text:
+                    continue
+                all_text.append(para_text)
+                # 获取字号和字体名称（取段落第一个 run）
+                run = p.find('a:r', NSMAP)
+                if run is not None:
+                    rpr = run.find('a:rPr', NSMAP)
+                    if rpr is not None:
+                        if rpr.get('sz'):
+                            font_size = int(rpr.get('sz')) / 100
+                        latin = rpr.find('a:latin', NSMAP)
+                        if latin is not None and latin.get('typeface'):
+                            font_name = latin.get('typeface')
+            if all_text:
+                left, top, width, height = position(elem)
+                collector.add('\n'.join(all_text), left, top, font_size, font_name, width, height)
+
+        def release(elem):
+            # 释放已处理的元素，保持内存占用与单个形状同量级
+            elem.clear()
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+
+        try:
+            with reader.open(slide_partname) as f:
+                tags = (TAG_SP, TAG_GRP_SP, TAG_GRP_SP_PR, TAG_GRAPHIC_FRAME)
+                for event, elem in etree.iterparse(f, events=('end',), tag=tags):
+                    if elem.tag == TAG_GRP_SP_PR:
+                        # 组合形状的属性先于子形状出现，此时压入坐标变换
+                        grp = elem.getparent()
+                        if grp.tag == TAG_GRP_SP and in_shape_tree(grp):
+                            transforms.append((grp,) + group_transform(elem, transforms[-1][1:]))
+                        continue
+
+                    if elem.tag == TAG_GRP_SP:
+                        if transforms[-1][0] is elem:
+                            transforms.pop()
+                            if elem.getparent().tag == TAG_SP_TREE:
+                                shape_count += 1
+                            release(elem)
+                        continue
+
+                    if not in_shape_tree(elem):
+                        continue
+                    if elem.getparent().tag == TAG_SP_TREE:
+                        shape_count += 1
+
+                    try:
+                        if elem.tag == TAG_GRAPHIC_FRAME:
+                            extract_table(elem)
+                        else:
+                            extract_sp(elem)
+                    except Exception as e:
+                        logger.warning("      💥 形状处理异常: %s", e)
+                    release(elem)
+            logger.debug("  🔍 幻灯片共有 %d 个形状对象", shape_count)
+        except Exception as e:
+            logger.warning("    ⚠️ 提取形状时出错: %s", e)
+
+        # 提取幻灯片备注（只读取已存在的备注页）
+        try:
+            collector.add_notes(reader.notes_text(slide_partname))
+        except Exception as e:
+            logger.warning("    ⚠️ 提取备注时出错: %s", e)
+
+        return collector.text_boxes
 
-        return text_boxes
+    def iter_slides(self):
+        """按顺序返回幻灯片（pptx 引擎为 Slide 对象，xml 引擎为幻灯片部件名）；选择了页面时只返回选中的页"""
+        if self.selected is not None:
+            return map(self.get_slide, self.selected)
+        if self.engine == 'xml':
+            return iter(self.reader.slide_partnames)
+        return iter(self.prs.slides)
+
+    def extract_notes(self, slide):
+        """notes_only 模式：只提取单页演讲备注（不带【备注】前缀），没有备注时返回空列表"""
+        collector = TextBoxCollector()
+        collector.add_notes(self.reader.notes_text(slide), prefix='')
+        return collector.text_boxes
+
+    def extract_slide_texts(self, slide):
+        """使用当前引擎提取单页文本框"""
+        if self.notes_only:
+            return self.extract_notes(slide)
+        if self.engine == 'xml':
+            return self.extract_all_texts_xml(slide)
+        return self.extract_all_texts_aggressive(slide)
+
+    def timed_slide_texts(self, slide):
+        """提取并排序单页，返回 (排序后的文本框列表, {'parse': 秒, 'sort': 秒, 'cached': False})"""
+        start = time.perf_counter()
+        text_boxes = self.extract_slide_texts(slide)
+        parsed = time.perf_counter()
+        sorted_boxes = self.sort_boxes(text_boxes)
+        return sorted_boxes, {'parse': parsed - start, 'sort': time.perf_counter() - parsed, 'cached': False}
+
+    def get_slide(self, index):
+        """按索引（从0开始）返回幻灯片"""
+        if self.engine == 'xml':
+            return self.reader.slide_partnames[index]
+        return self.prs.slides[index]
+
+    def slide_cache_key(self, index):
+        """单页缓存键：记录格式版本 + 提取引擎 + 阅读顺序 + 幻灯片内容指纹"""
+        fingerprint = self.reader.slide_fingerprint(self.reader.slide_partnames[index])
+        # 列优先排序不写入键，已有的缓存继续有效
+        if self.layout != 'columns':
+            return f"{SLIDE_CACHE_VERSION}:{self.engine}:{self.layout}:{fingerprint}"
+        return f"{SLIDE_CACHE_VERSION}:{self.engine}:{fingerprint}"
+
+    def cached_slide_texts(self, index):
+        """查询单页缓存，返回 (缓存键, 排序后的文本框列表或 None)"""
+        if self.slide_cache is None:
+            return None, None
+        key = self.slide_cache_key(index)
+        text_boxes = self.slide_cache.get(key)
+        if text_boxes is not None:
+            self.cache_hits += 1
+        return key, text_boxes
+
+    def sorted_slide_texts(self, index, slide=None):
+        """提取并按阅读顺序排序单页文本框；启用单页缓存时复用内容未变化的页"""
+        key, text_boxes = self.cached_slide_texts(index)
+        if text_boxes is not None:
+            logger.debug("  ♻️ 第 %d 页内容未变化，复用缓存", index + 1)
+            self.slide_timings[index] = {'parse': 0.0, 'sort': 0.0, 'cached': True}
+            return text_boxes
+
+        if slide is None:
+            slide = self.get_slide(index)
+        sorted_boxes, timing = self.timed_slide_texts(slide)
+        self.slide_timings[index] = timing
+        if key:
+            self.slide_cache.put(key, sorted_boxes)
+        return sorted_boxes
+
+    def iter_parallel_results(self, workers):
+        """
+        在进程池中并行提取并排序，按幻灯片顺序逐页返回结果
+        每页结果为排序后的文本框列表；该页出错时为异常对象
+        启用单页缓存时只把未命中的页分派给子进程
+        """
+        results = {}
+        keys = {}
+        pending = []
+        for index in self.slide_indices:
+            key, text_boxes = self.cached_slide_texts(index)
+            if text_boxes is not None:
+                results[index] = text_boxes
+                self.slide_timings[index] = {'parse': 0.0, 'sort': 0.0, 'cached': True}
+            else:
+                keys[index] = key
+                pending.append(index)
+
+        # 每个任务处理一段连续页码，任务数多于进程数以均衡负载
+        chunk_size = max(1, -(-len(pending) // (workers * 4)))
+        chunks = [pending[start:start + chunk_size] for start in range(0, len(pending), chunk_size)]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for chunk in chunks:
+                future = pool.submit(extract_slide_range, self.ppt_path, self.engine, chunk, self.layout,
+                                     self.notes_only)
+                for index in chunk:
+                    futures[index] = (future, chunk)
+
+            for index in self.slide_indices:
+                if index not in results:
+                    future, chunk = futures[index]
+                    try:
+                        chunk_results = future.result()
+                    except Exception as e:
+                        chunk_results = [(i, e, None) for i in chunk]
+                    for i, result, timing in chunk_results:
+                        results[i] = result
+                        if timing is not None:
+                            self.slide_timings[i] = timing
+                        if keys[i] and not isinstance(result, Exception):
+                            self.slide_cache.put(keys[i], result)
+                yield results.pop(index)
+
+    def iter_extracted_slides(self, workers=1, progress_callback=None):
+        """
+        按幻灯片顺序逐页提取并排序（只包含选中的页，与 slide_indices 一一对应），
+        返回排序后的文本框列表；该页出错时为异常对象
+        progress_callback(第几页, 总页数, 消息) 在开始处理每一页前调用，页数按选中的页计
+        """
+        total = self.slide_count
+        parallel = self.iter_parallel_results(workers) if workers > 1 else None
+        for position, (index, slide) in enumerate(zip(self.slide_indices, self.iter_slides()), 1):
+            if progress_callback:
+                if self.selected is not None:
+                    message = f'处理第 {index + 1} 页（{position}/{total}）...'
+                else:
+                    message = f'处理第 {position}/{total} 页...'
+                progress_callback(position, total, message)
+            if parallel is not None:
+                # 并行模式下在子进程中完成
+                yield next(parallel)
+                continue
+            try:
+                yield self.sorted_slide_texts(index, slide)
+            except Exception as e:
+                yield e
+
+    def iter_slide_results(self, workers=1, progress_callback=None):
+        """
+        iter_extracted_slides 加上跨页重复内容处理
+        boilerplate 不为 'keep' 时需要先提取全部页面再统计，之后逐页返回过滤后的结果；
+        保存的只是紧凑的文本框记录，内存占用远小于幻灯片 XML
+        """
+        results = self.iter_extracted_slides(workers, progress_callback)
+        if self.boilerplate == 'keep':
+            yield from results
+            return
+
+        slides = list(results)
+        fingerprints = find_boilerplate([None if isinstance(r, Exception) else r for r in slides],
+                                        self.boilerplate_ratio)
+        self.boilerplate_found = len(fingerprints)
+        boilerplate_filter = BoilerplateFilter(fingerprints, self.boilerplate)
+        # 返回第一页前先过滤全部页面：调用方（zip 到最后一页即停止）不会在最后一次 yield 之后恢复生成器，
+        # 省略数必须在此之前统计完整
+        for index, result in enumerate(slides):
+            if not isinstance(result, Exception):
+                slides[index] = boilerplate_filter.apply(result)
+        self.boilerplate_removed = boilerplate_filter.removed
+        logger.debug("  ♻️ 跨页重复内容 %d 种，省略 %d 个文本框", self.boilerplate_found, self.boilerplate_removed)
+        for index, result in enumerate(slides):
+            slides[index] = None  # 逐页释放
+            yield result
+
+    def close(self):
+        """写入单页缓存并关闭压缩包"""
+        if self.slide_cache is not None:
+            self.slide_cache.close()
+            self.slide_cache = None
+        if self.reader is not None:
+            self.reader.close()
     
-    def column_based_sort(self, text_boxes):
+    def sort_boxes(self, text_boxes):
+        """按 layout 选项排列单页文本框"""
+        if self.layout == 'xycut':
+            # 备注不在页面版面上，参与切分会被排进正文中间
+            body = [box for box in text_boxes if not is_notes_box(box)]
+            if len(body) == len(text_boxes):
+                return xy_cut_sort(text_boxes)
+            return xy_cut_sort(body) + [box for box in text_boxes if is_notes_box(box)]
+        return self.column_based_sort(text_boxes)
+
+    def column_based_sort(self, text_boxes, tolerance=COLUMN_TOLERANCE, use_width=False):
         """
         列优先排序：从左到右分列，每列内从上到下
         这是最符合PPT布局的阅读顺序
+
+        use_width=True 时，文本框与列的水平范围有重叠也归入该列
         """
         if not text_boxes:
             return []
 
-        print(f"\n  📊 开始列优先排序...")
-        print(f"  原始文本框数量: {len(text_boxes)}")
+        logger.debug("\n  📊 开始列优先排序...")
+        logger.debug("  原始文本框数量: %d", len(text_boxes))
 
         # 第一步：按left值排序，识别列
-        sorted_by_left = sorted(text_boxes, key=lambda x: x['left'])
+        sorted_by_left = sorted(text_boxes, key=attrgetter('left'))
 
-        # 第二步：动态识别列
-        # 使用聚类算法识别列边界
+        # 第二步：扫描线识别列
+        # 文本框按left递增处理，列的平均left不会超过当前left；
+        # 一旦某列与当前left的距离超出容差，之后也不可能再匹配，可永久移出候选队列。
+        # 因此每个文本框只需与最早创建的仍有效的列比较，结果与逐列比较完全相同。
         columns = []
-        COLUMN_TOLERANCE = 500000  # 列间距容差，约500px
+        left_sums = []   # 每列left之和（增量维护平均值）
+        rights = []      # 每列最右边界（use_width 时使用）
+        active = deque()  # 仍可能接收文本框的列，按创建顺序
 
         for box in sorted_by_left:
-            placed = False
-
-            # 尝试将文本框放入已有的列
-            for col in columns:
-                # 计算该列的平均left值
-                avg_left = sum(b['left'] for b in col) / len(col)
-
-                # 如果文本框的left值与列的平均值接近，归入该列
-                if abs(box['left'] - avg_left) < COLUMN_TOLERANCE:
+            left = box.left
+            while active:
+                idx = active[0]
+                col = columns[idx]
+                # 如果文本框的left值与列的平均值接近，或与列水平重叠，归入该列
+                if left - left_sums[idx] / len(col) < tolerance or (use_width and left <= rights[idx]):
                     col.append(box)
-                    placed = True
+                    left_sums[idx] += left
+                    if use_width:
+                        rights[idx] = max(rights[idx], left + (box.width or 0))
                     break
-
-            # 如果没有合适的列，创建新列
-            if not placed:
+                active.popleft()
+            else:
+                # 如果没有合适的列，创建新列
                 columns.append([box])
+                left_sums.append(left)
+                rights.append(left + (box.width or 0))
+                active.append(len(columns) - 1)
 
-        print(f"  ✓ 识别到 {len(columns)} 列")
+        logger.debug("  ✓ 识别到 %d 列", len(columns))
 
         # 第三步：每列内按top值（从上到下）排序
+        # 列按left递增追加，首尾元素即为该列的Left范围
         for i, col in enumerate(columns):
-            col.sort(key=lambda x: x['top'])
-            min_left = min(b['left'] for b in col)
-            max_left = max(b['left'] for b in col)
-            print(f"    列{i+1}: {len(col)} 个文本框 (Left范围: {int(min_left)} - {int(max_left)})")
+            min_left = col[0].left
+            max_left = col[-1].left
+            col.sort(key=attrgetter('top'))
+            logger.debug("    列%d: %d 个文本框 (Left范围: %d - %d)", i + 1, len(col), min_left, max_left)
 
-        # 第四步：按列的left值排序列（确保从左到右）
-        columns.sort(key=lambda col: min(b['left'] for b in col))
+        # 第四步：列按创建顺序即已从左到右（首个文本框的left递增），无需再排序
 
         # 第五步：按列顺序合并所有文本框
         sorted_boxes = []
         for col in columns:
             sorted_boxes.extend(col)
 
-        print(f"  ✓ 排序完成：共 {len(sorted_boxes)} 个文本框")
+        logger.debug("  ✓ 排序完成：共 %d 个文本框", len(sorted_boxes))
 
         return sorted_boxes
     
-    def set_font(self, run, font_name='微软雅黑'):
-        """设置字体，支持多种字体回退"""
-        try:
-            # 尝试设置指定字体
-            run.font.name = font_name
-            run._element.rPr.rFonts.set(qn('w:eastAsia'), font_name)
-        except Exception as e:
-            # 如果失败，使用默认字体
-            try:
-                run.font.name = '微软雅黑'
-                run._element.rPr.rFonts.set(qn('w:eastAsia'), '微软雅黑')
-            except:
-                pass  # 忽略字体设置错误
-    
-    def export_to_word(self, output_path):
-        """导出到Word文档"""
-        print(f"\n📄 开始处理PPT文件...\n")
+    @property
+    def output_extension(self):
+        """输出文件扩展名（含点）"""
+        return self.OUTPUT_FORMATS[self.output_format][0]
+
+    def create_writer(self, output_path):
+        """按输出格式创建写入器，Word 格式按 writer 选项选择实现"""
+        writer_class = self.OUTPUT_FORMATS[self.output_format][1] or self.WRITERS[self.writer]
+        return writer_class(output_path)
+
+    def export_to_word(self, output_path, workers=1):
+        """
+        导出文档（Word 或 output_format 指定的格式），workers > 1 时在多个进程中并行提取
+        返回 export_stats 统计信息
+        """
+        logger.info("\n📄 开始处理PPT文件...\n")
         
+        export_start = time.perf_counter()
         total_text_count = 0
-        
-        for slide_num, slide in enumerate(self.prs.slides, 1):
-            print(f"{'='*70}")
-            print(f"处理第 {slide_num}/{len(self.prs.slides)} 页")
-            print(f"{'='*70}")
-            
+        writer = self.create_writer(output_path)
+
+        def log_slide(position, total, message):
+            logger.info("%s\n%s\n%s", '=' * 70, message.rstrip('.'), '=' * 70)
+
+        # 激进式提取所有文本并按列优先排序；标题使用原始页码
+        results = self.iter_slide_results(workers, log_slide)
+        for index, sorted_boxes in zip(self.slide_indices, results):
+            slide_num = index + 1
             try:
                 # 添加幻灯片标题
-                heading = self.doc.add_heading(f'幻灯片 {slide_num}', level=1)
-                heading.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-                for run in heading.runs:
-                    self.set_font(run)
-                
-                # 激进式提取所有文本
-                text_boxes = self.extract_all_texts_aggressive(slide)
-                print(f"  ✓ 提取到 {len(text_boxes)} 个文本框")
-                
-                if not text_boxes:
-                    print(f"  ⚠️  该页没有文本内容")
-                    para = self.doc.add_paragraph("【此页无文本内容】")
-                    self.set_font(para.runs[0])
-                    self.doc.add_page_break()
-                    continue
-                
-                # 按列优先排序
-                sorted_boxes = self.column_based_sort(text_boxes)
-                
-                print(f"\n  📝 提取文本详细信息（共{len(sorted_boxes)}条）:")
-
-                # 写入Word并显示详细调试信息
-                for idx, tb in enumerate(sorted_boxes, 1):
-                    text = tb['text']
-                    font_size = tb['font_size']
-                    font_name = tb.get('font_name', '微软雅黑')  # 获取原始字体名称
-
-                    # 显示提取的文本预览（带详细位置和字体）
-                    preview = text.replace('\n', ' ')[:50] + "..." if len(text) > 50 else text.replace('\n', ' ')
-                    print(f"  [{idx:2d}] Left:{int(tb['left']):7d} Top:{int(tb['top']):7d} Size:{font_size:4.1f}pt Font:{font_name} | {preview}")
-
-                    # 根据字号判断样式
-                    if font_size >= 22:
-                        # 大标题
-                        para = self.doc.add_heading(text, level=2)
-                        for run in para.runs:
-                            self.set_font(run, font_name)
-                    elif font_size >= 16:
-                        # 中标题
-                        para = self.doc.add_paragraph()
-                        run = para.add_run(text)
-                        run.font.size = Pt(15)
-                        run.font.bold = True
-                        self.set_font(run, font_name)
-                    elif font_size >= 13:
-                        # 小标题
-                        para = self.doc.add_paragraph()
-                        run = para.add_run(text)
-                        run.font.size = Pt(12)
-                        self.set_font(run, font_name)
-                    else:
-                        # 正文
-                        para = self.doc.add_paragraph(text)
-                        if para.runs:
-                            para.runs[0].font.size = Pt(11)
-                            self.set_font(para.runs[0], font_name)
+                write_start = time.perf_counter()
+                writer.add_slide_heading(slide_num)
+                write_seconds = time.perf_counter() - write_start
+
+                if isinstance(sorted_boxes, Exception):
+                    raise sorted_boxes
+                logger.info("  ✓ 提取到 %d 个文本框", len(sorted_boxes))
                 
-                total_text_count += len(sorted_boxes)
+                write_start = time.perf_counter()
+                if not sorted_boxes:
+                    logger.info("  ⚠️  该页没有文本内容")
+                    writer.add_empty_notice()
+                else:
+                    debug = logger.isEnabledFor(logging.DEBUG)
+                    logger.debug("\n  📝 提取文本详细信息（共%d条）:", len(sorted_boxes))
+
+                    # 写入输出文档并显示详细调试信息
+                    for idx, tb in enumerate(sorted_boxes, 1):
+                        # 显示提取的文本预览（带详细位置和字体）
+                        if debug:
+                            text = tb.text
+                            preview = text.replace('\n', ' ')[:50] + "..." if len(text) > 50 else text.replace('\n', ' ')
+                            logger.debug("  [%2d] Left:%7d Top:%7d Size:%4.1fpt Font:%s | %s",
+                                         idx, tb.left, tb.top, tb.font_size, tb.font_name, preview)
+
+                        writer.add_box(tb)
+                    
+                    total_text_count += len(sorted_boxes)
                 
                 # 幻灯片之间添加分隔
-                self.doc.add_page_break()
+                writer.add_page_break()
+                self.record_write_time(slide_num - 1, write_seconds + time.perf_counter() - write_start)
                 
             except Exception as e:
-                print(f"❌ 处理第 {slide_num} 页时出错: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.error("❌ 处理第 %d 页时出错: %s", slide_num, e, exc_info=True)
                 continue
         
         # 保存文档
         try:
-            self.doc.save(output_path)
-            print(f"\n{'='*70}")
-            print(f"✅ 导出成功!")
-            print(f"{'='*70}")
-            print(f"📊 统计信息:")
-            print(f"   - 总页数: {len(self.prs.slides)}")
-            print(f"   - 提取文本块: {total_text_count}")
-            print(f"   - 字体: 微软雅黑")
-            print(f"   - 输出文件: {output_path}")
-            print(f"{'='*70}")
+            save_start = time.perf_counter()
+            writer.close()
+            if self.slide_cache is not None:
+                self.slide_cache.commit()
+            stats = self.export_stats(total_text_count, time.perf_counter() - save_start,
+                                      time.perf_counter() - export_start)
+            timings = stats['timings']
+            logger.info("\n%s", '=' * 70)
+            logger.info("✅ 导出成功!")
+            logger.info("%s", '=' * 70)
+            logger.info("📊 统计信息:")
+            logger.info("   - 总页数: %d", self.slide_count)
+            if self.selected is not None:
+                logger.info("   - 选中页面: %d/%d 页", self.slide_count, self.total_slides)
+            logger.info("   - 提取文本块: %d", total_text_count)
+            if self.slide_cache is not None:
+                logger.info("   - 复用缓存: %d/%d 页", self.cache_hits, self.slide_count)
+            if self.boilerplate != 'keep':
+                logger.info("   - 跨页重复内容: %d 种，省略 %d 个文本框", self.boilerplate_found, self.boilerplate_removed)
+            logger.info("   - 耗时: 打开 %.2fs / 解析 %.2fs / 排序 %.2fs / 写入 %.2fs / 保存 %.2fs，共 %.2fs",
+                        timings['open'], timings['parse'], timings['sort'], timings['write'],
+                        timings['save'], timings['total'])
+            if self.output_format == 'docx':
+                logger.info("   - 字体: 微软雅黑")
+            logger.info("   - 输出文件: %s", output_path)
+            logger.info("%s", '=' * 70)
+            return stats
         except Exception as e:
-            print(f"❌ 保存Word文档时出错: {str(e)}")
+            logger.error("❌ 保存输出文档时出错: %s", e)
             raise
 
-    def export_to_word_with_progress(self, output_path, progress_callback=None):
-        """导出到Word文档，支持进度回调"""
+    def export_to_word_with_progress(self, output_path, progress_callback=None, workers=1):
+        """
+        导出文档（Word 或 output_format 指定的格式），支持进度回调；workers > 1 时在多个进程中并行提取
+        返回 export_stats 统计信息（文本块数、各阶段耗时和逐页耗时）
+        """
+        export_start = time.perf_counter()
         total_text_count = 0
-        total_slides = len(self.prs.slides)
-
-        for slide_num, slide in enumerate(self.prs.slides, 1):
-            if progress_callback:
-                progress_callback(slide_num, total_slides, f'处理第 {slide_num}/{total_slides} 页...')
+        total_slides = self.slide_count
+        writer = self.create_writer(output_path)
 
+        # 激进式提取所有文本并按列优先排序；标题使用原始页码
+        results = self.iter_slide_results(workers, progress_callback)
+        for position, (index, sorted_boxes) in enumerate(zip(self.slide_indices, results), 1):
+            slide_num = index + 1
             try:
                 # 添加幻灯片标题
-                heading = self.doc.add_heading(f'幻灯片 {slide_num}', level=1)
-                heading.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-                for run in heading.runs:
-                    self.set_font(run)
-
-                # 激进式提取所有文本
-                text_boxes = self.extract_all_texts_aggressive(slide)
-
-                if not text_boxes:
-                    para = self.doc.add_paragraph("【此页无文本内容】")
-                    self.set_font(para.runs[0])
-                    self.doc.add_page_break()
-                    continue
+                write_start = time.perf_counter()
+                writer.add_slide_heading(slide_num)
+                write_seconds = time.perf_counter() - write_start
 
-                # 按列优先排序
-                sorted_boxes = self.column_based_sort(text_boxes)
-
-                # 写入Word
-                for tb in sorted_boxes:
-                    text = tb['text']
-                    font_size = tb['font_size']
-                    font_name = tb.get('font_name', '微软雅黑')  # 获取原始字体名称
-
-                    # 根据字号判断样式
-                    if font_size >= 22:
-                        para = self.doc.add_heading(text, level=2)
-                        for run in para.runs:
-                            self.set_font(run, font_name)
-                    elif font_size >= 16:
-                        para = self.doc.add_paragraph()
-                        run = para.add_run(text)
-                        run.font.size = Pt(15)
-                        run.font.bold = True
-                        self.set_font(run, font_name)
-                    elif font_size >= 13:
-                        para = self.doc.add_paragraph()
-                        run = para.add_run(text)
-                        run.font.size = Pt(12)
-                        self.set_font(run, font_name)
-                    else:
-                        para = self.doc.add_paragraph(text)
-                        if para.runs:
-                            para.runs[0].font.size = Pt(11)
-                            self.set_font(para.runs[0], font_name)
-
-                total_text_count += len(sorted_boxes)
+                if isinstance(sorted_boxes, Exception):
+                    raise sorted_boxes
+
+                write_start = time.perf_counter()
+                if not sorted_boxes:
+                    writer.add_empty_notice()
+                else:
+                    # 写入输出文档（表格、字号层级由写入器处理）
+                    for tb in sorted_boxes:
+                        writer.add_box(tb)
+
+                    total_text_count += len(sorted_boxes)
 
                 # 幻灯片之间添加分隔
-                self.doc.add_page_break()
+                writer.add_page_break()
+                self.record_write_time(slide_num - 1, write_seconds + time.perf_counter() - write_start)
 
             except Exception as e:
                 if progress_callback:
-                    progress_callback(slide_num, total_slides, f'处理第 {slide_num} 页时出错: {str(e)}')
+                    progress_callback(position, total_slides, f'处理第 {slide_num} 页时出错: {str(e)}')
                 continue
 
         # 保存文档
-        self.doc.save(output_path)
+        save_start = time.perf_counter()
+        writer.close()
+        if self.slide_cache is not None:
+            self.slide_cache.commit()
+        stats = self.export_stats(total_text_count, time.perf_counter() - save_start,
+                                  time.perf_counter() - export_start)
         if progress_callback:
-            progress_callback(total_slides, total_slides, '导出完成！')
-        return total_text_count
+            if self.slide_cache is not None:
+                progress_callback(total_slides, total_slides,
+                                  f'导出完成！（{self.cache_hits}/{total_slides} 页复用缓存）')
+            else:
+                progress_callback(total_slides, total_slides, '导出完成！')
+        return stats
+
+    def record_write_time(self, index, seconds):
+        """记录单页写入 Word 的耗时"""
+        self.slide_timings.setdefault(index, {'parse': 0.0, 'sort': 0.0, 'cached': False})['write'] = seconds
+
+    def export_stats(self, text_blocks, save_seconds, export_seconds):
+        """
+        汇总导出结果：
+        timings 为各阶段总耗时（秒）：open / parse / sort / write / save / total
+        slide_timings 为逐页耗时，按页码排列
+        """
+        slide_timings = []
+        for index in sorted(self.slide_timings):
+            timing = self.slide_timings[index]
+            slide_timings.append({
+                'slide': index + 1,
+                'parse': timing['parse'],
+                'sort': timing['sort'],
+                'write': timing.get('write', 0.0),
+                'cached': timing['cached'],
+            })
+        return {
+            'text_blocks': text_blocks,
+            'slides': self.slide_count,
+            'cache_hits': self.cache_hits,
+            'boilerplate_removed': self.boilerplate_removed,
+            'timings': {
+                'open': self.open_seconds,
+                'parse': sum(t['parse'] for t in slide_timings),
+                'sort': sum(t['sort'] for t in slide_timings),
+                'write': sum(t['write'] for t in slide_timings),
+                'save': save_seconds,
+                'total': self.open_seconds + export_seconds,
+            },
+            'slide_timings': slide_timings,
+        }
+
+
+def extract_slide_range(ppt_path, engine, slide_indices, layout='columns', notes_only=False):
+    """
+    进程池任务：提取并排序指定页
+    返回 [(页索引, 排序后的文本框列表或异常对象, 耗时)]，只包含可序列化的普通数据
+    """
+    results = []
+    # 只打开本段页面：pptx 引擎不加载其余页面的部件
+    extractor = SmartPPTExtractor(ppt_path, engine=engine, layout=layout, notes_only=notes_only,
+                                  slides=[index + 1 for index in slide_indices])
+    for index in slide_indices:
+        try:
+            sorted_boxes = extractor.sorted_slide_texts(index)
+            results.append((index, sorted_boxes, extractor.slide_timings.get(index)))
+        except Exception as e:
+            # 异常对象不一定能跨进程序列化，只保留错误信息
+            results.append((index, RuntimeError(str(e)), None))
+    return results
 
 
 def select_ppt_file():
@@ -452,17 +1436,63 @@ def select_ppt_file():
         return None
 
 
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="PPT智能文案提取工具")
+    parser.add_argument('ppt_path', nargs='?', help="PPT文件路径，省略时弹出文件选择对话框")
+    parser.add_argument('--engine', choices=SmartPPTExtractor.ENGINES, default='pptx',
+                        help="提取引擎：pptx（默认）或 xml（直接解析XML，更快）")
+    parser.add_argument('--writer', choices=tuple(SmartPPTExtractor.WRITERS), default='docx',
+                        help="Word写入器：docx（默认，python-docx）或 xml（直接流式写入，更快）")
+    parser.add_argument('--format', dest='output_format', choices=tuple(SmartPPTExtractor.OUTPUT_FORMATS),
+                        default='docx',
+                        help="输出格式：docx（默认，Word）、md（Markdown）、txt（纯文本）或 jsonl（带坐标和字体的 JSON Lines）")
+    parser.add_argument('--layout', choices=SmartPPTExtractor.LAYOUTS, default='columns',
+                        help="阅读顺序：columns（默认，列优先）或 xycut（按空白递归切分行和列，适合卡片网格等多行布局）")
+    parser.add_argument('--boilerplate', choices=SmartPPTExtractor.BOILERPLATE_MODES, default='keep',
+                        help="跨页重复的页眉、页脚、页码、保密声明等文本：keep（默认，保留）、once（只保留第一次出现）或 drop（全部省略）")
+    parser.add_argument('--boilerplate-ratio', type=float, default=BOILERPLATE_RATIO,
+                        help=f"出现在超过该比例页面上的同位置文本视为重复内容（默认 {BOILERPLATE_RATIO}）")
+    parser.add_argument('--notes-only', action='store_true',
+                        help="只导出演讲备注（讲稿），不提取幻灯片上的文本，只读取备注页，速度很快")
+    parser.add_argument('--slides', metavar='RANGE',
+                        help="只提取这些页，如 1-5,8,12-（从 1 开始），只读取选中页面的部件")
+    parser.add_argument('--section', dest='sections', action='append', metavar='NAME',
+                        help="只提取该节中的页面，可重复指定；与 --slides 取并集")
+    parser.add_argument('--low-memory', action='store_true',
+                        help="低内存模式：使用 xml 引擎和 xml 写入器，不加载图片等媒体，适合超大文件")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="并行提取的进程数，0 表示使用全部CPU核心（默认1，顺序处理）")
+    parser.add_argument('--slide-cache', default=DEFAULT_SLIDE_CACHE,
+                        help=f"单页缓存数据库路径，内容未变化的页直接复用（默认 {DEFAULT_SLIDE_CACHE}）")
+    parser.add_argument('--no-slide-cache', dest='slide_cache', action='store_const', const=None,
+                        help="禁用单页缓存")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="输出逐形状、逐文本框的详细调试信息")
+    args = parser.parse_args(argv)
+    if not 0 <= args.boilerplate_ratio < 1:
+        parser.error("--boilerplate-ratio 需在 0 到 1 之间")
+    if args.slides is not None:
+        try:
+            parse_slide_ranges(args.slides)
+        except ValueError as e:
+            parser.error(f"--slides: {e}")
+    return args
+
+
 def main():
+    args = parse_args()
+    workers = args.workers or os.cpu_count() or 1
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(message)s', stream=sys.stdout)
+
     print("\n" + "="*70)
     print("PPT智能文案提取工具 v4.0 - 终极完全版")
     print("特性: 列优先排序 | 零遗漏提取 | 微软雅黑字体")
     print("="*70 + "\n")
     
     # 获取PPT文件路径
-    ppt_path = None
-    
-    if len(sys.argv) > 1:
-        ppt_path = sys.argv[1]
+    ppt_path = args.ppt_path
     
     if not ppt_path:
         try:
@@ -483,15 +1513,27 @@ def main():
         print(f"❌ 文件不存在: {ppt_path}")
         return
     
-    # 生成输出路径
-    base_name = os.path.splitext(os.path.basename(ppt_path))[0]
-    output_dir = os.path.dirname(ppt_path) or os.path.expanduser("~/Desktop")
-    output_path = os.path.join(output_dir, f"{base_name}_完整提取.docx")
-    
     # 执行提取
     try:
-        extractor = SmartPPTExtractor(ppt_path)
-        extractor.export_to_word(output_path)
+        extractor = SmartPPTExtractor(ppt_path, engine=args.engine, slide_cache=args.slide_cache,
+                                      writer=args.writer, low_memory=args.low_memory,
+                                      output_format=args.output_format, layout=args.layout,
+                                      boilerplate=args.boilerplate, boilerplate_ratio=args.boilerplate_ratio,
+                                      notes_only=args.notes_only, slides=args.slides, sections=args.sections)
+
+        # 生成输出路径
+        base_name = os.path.splitext(os.path.basename(ppt_path))[0]
+        output_dir = os.path.dirname(ppt_path) or os.path.expanduser("~/Desktop")
+        if args.notes_only:
+            suffix = '演讲备注'
+        else:
+            suffix = '部分提取' if extractor.selected is not None else '完整提取'
+        output_path = os.path.join(output_dir, f"{base_name}_{suffix}{extractor.output_extension}")
+
+        try:
+            extractor.export_to_word(output_path, workers=workers)
+        finally:
+            extractor.close()
 
         print("\n✨ 完成！按Enter键退出...")
         try:
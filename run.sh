@@ -11,6 +11,12 @@ echo ""
 echo -e "${BLUE}🚀 启动 PPT Transfer (开发模式)${NC}"
 echo ""
 
+# 检查 Python 版本（Werkzeug 2.3 起需要 Python 3.8+）
+python3 -c "import sys; sys.exit(sys.version_info < (3, 8))" || {
+    echo -e "${YELLOW}⚠️  需要 Python 3.8 或更高版本${NC}"
+    exit 1
+}
+
 # 检查并创建虚拟环境
 if [ ! -d "venv" ]; then
     echo -e "${YELLOW}📦 创建虚拟环境...${NC}"
@@ -18,10 +24,10 @@ if [ ! -d "venv" ]; then
     echo ""
 fi
 
-# 检查依赖
-./venv/bin/python -c "import flask" 2>/dev/null || {
+# 检查依赖（上传解析需要 Werkzeug 2.3+ 的 MultipartDecoder max_parts 参数，旧虚拟环境会被升级）
+./venv/bin/python -c "import flask, pptx, docx, PIL; from werkzeug.sansio.multipart import MultipartDecoder; MultipartDecoder(b'-', max_parts=1)" 2>/dev/null || {
     echo -e "${YELLOW}📦 正在安装依赖...${NC}"
-    ./venv/bin/pip install flask python-pptx python-docx werkzeug Pillow
+    ./venv/bin/pip install "flask>=2.3" python-pptx python-docx "werkzeug>=2.3" Pillow
     echo ""
 }
 
@@ -6,30 +6,530 @@ macOS Sequoia Style - PPT 文案提取工具
 """
 
 from flask import Flask, render_template, request, send_file, jsonify, Response
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
 import os
+import re
 import sys
 import webbrowser
 import threading
 import time
 import uuid
 from werkzeug.utils import secure_filename
-from extract_ppt import SmartPPTExtractor
+from extract_ppt import SmartPPTExtractor, parse_slide_ranges
+from boilerplate import DEFAULT_RATIO as BOILERPLATE_RATIO
+import sse_server
+from sse_server import (PROGRESS_HEARTBEAT, PROGRESS_RETRY_MS, FINAL_STATUSES, parse_last_event_id,
+                        sse_event, sse_task_missing)
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import MultipartDecoder, Field, File, Data, Epilogue, NeedData
 import shutil
 from pathlib import Path
-import queue
+import tempfile
+import zipfile
+
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['EXPORT_FOLDER'] = 'exports'
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB limit
+# 上传按块流式写入磁盘，单次读取的块大小决定了每个上传占用的内存
+app.config['UPLOAD_CHUNK_SIZE'] = 64 * 1024
+app.config['MAX_FORM_FIELD_SIZE'] = 64 * 1024
+# 低内存模式：xml 引擎 + 流式写入，不加载图片等媒体，适合内存有限时处理超大文件
+app.config['LOW_MEMORY'] = os.environ.get('PPT_LOW_MEMORY', '0') == '1'
+# 单个任务并行提取的进程数（1 表示顺序处理）
+app.config['EXTRACT_WORKERS'] = int(os.environ.get('PPT_EXTRACT_WORKERS', 1))
+# 同时执行的提取任务数，以及可排队等待的任务数（超出时返回 429）
+app.config['MAX_CONCURRENT_JOBS'] = int(os.environ.get('PPT_MAX_CONCURRENT_JOBS', 2))
+app.config['MAX_QUEUED_JOBS'] = int(os.environ.get('PPT_MAX_QUEUED_JOBS', 8))
+# 结果缓存：相同文件 + 相同选项直接返回已生成的文档（重启后保留）
+app.config['CACHE_FOLDER'] = 'cache'
+app.config['CACHE_MAX_BYTES'] = int(os.environ.get('PPT_CACHE_MAX_BYTES', 1024 * 1024 * 1024))  # 1GB
+app.config['CACHE_MAX_AGE'] = int(os.environ.get('PPT_CACHE_MAX_AGE', 7 * 24 * 3600))  # 7天
+# 单页缓存：重新上传修改过的文件时，只重新解析内容变化的页
+app.config['SLIDE_CACHE_PATH'] = os.path.join(app.config['CACHE_FOLDER'], 'slides.sqlite3')
+# 后台清理：上传和导出文件的最长保留时间（秒），导出目录的总容量上限，以及清理间隔（秒）
+app.config['UPLOAD_MAX_AGE'] = int(os.environ.get('PPT_UPLOAD_MAX_AGE', 3600))
+app.config['EXPORT_MAX_AGE'] = int(os.environ.get('PPT_EXPORT_MAX_AGE', 3600))
+app.config['EXPORT_MAX_BYTES'] = int(os.environ.get('PPT_EXPORT_MAX_BYTES', 2 * 1024 * 1024 * 1024))  # 2GB
+app.config['JANITOR_INTERVAL'] = int(os.environ.get('PPT_JANITOR_INTERVAL', 300))
+# 进度状态保留时间（秒）：超过该时间无更新且无人读取的任务状态被清理，期间断线的客户端可以重连
+app.config['PROGRESS_TTL'] = int(os.environ.get('PPT_PROGRESS_TTL', 600))
+# SSE 进度流改由 asyncio 事件循环处理，观察者不占用线程（见 sse_server.py 中的限制）
+app.config['ASYNC_SSE'] = os.environ.get('PPT_ASYNC_SSE', '0') == '1'
 
 # Ensure directories exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['EXPORT_FOLDER'], exist_ok=True)
+os.makedirs(app.config['CACHE_FOLDER'], exist_ok=True)
 os.makedirs('static', exist_ok=True)
 
-# 进度跟踪
-progress_queues = {}
+# .pptx 是 ZIP 压缩包，文件头为本地文件头签名
+ZIP_MAGIC = b'PK\x03\x04'
+
+# 逐页进度的最小发送间隔（秒）：百分比不变时合并过于频繁的更新
+PROGRESS_MIN_INTERVAL = 0.2
+
+# 结果缓存读写锁
+cache_lock = threading.Lock()
+# 结果缓存格式版本：导出内容有变化（表格、样式等）时递增，升级后不再返回旧版本生成的文档
+RESULT_CACHE_VERSION = 4
+# 结果缓存中的文件：缓存键（SHA-256）+ 扩展名
+CACHE_ENTRY = re.compile(r'^([0-9a-f]{64})(\.[a-z]+)$')
+
+# 任务调度器（首次提交任务时创建）
+scheduler = None
+scheduler_lock = threading.Lock()
+
+# 任务进程中的进度消息队列（由 init_job_process 设置）
+job_events = None
+
+# 后台清理线程（start_janitor 启动）
+janitor_started = False
+janitor_lock = threading.Lock()
+
+# 整体导出各阶段耗时的直方图分桶（秒）
+STAGE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# 单页各阶段耗时的直方图分桶（秒）
+SLIDE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+class Histogram:
+    """按单个标签分组的累积直方图，输出 Prometheus 文本格式"""
+
+    def __init__(self, name, help_text, label, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self.series = {}  # 标签值 -> [各分桶计数, 总和, 总数]
+
+    def observe(self, label_value, value):
+        series = self.series.get(label_value)
+        if series is None:
+            series = self.series[label_value] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label_value, (counts, total, count) in sorted(self.series.items()):
+            label = f'{self.label}="{label_value}"'
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{label}}} {count}')
+        return lines
+
+
+class ServerMetrics:
+    """
+    服务端指标：任务结果计数、导出各阶段耗时和单页耗时直方图
+    任务在独立进程中执行，耗时数据随完成消息回到主进程后在此汇总
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jobs = {}  # 结果 -> 次数（completed / error / cached / rejected）
+        self.slides = 0
+        self.slide_cache_hits = 0
+        self.text_blocks = 0
+        self.stage_seconds = Histogram('ppt_export_stage_seconds', '每个导出任务各阶段的耗时', 'stage',
+                                       STAGE_BUCKETS)
+        self.slide_seconds = Histogram('ppt_export_slide_seconds', '单页解析、排序、写入的耗时', 'stage',
+                                       SLIDE_BUCKETS)
+
+    def count_job(self, result):
+        with self.lock:
+            self.jobs[result] = self.jobs.get(result, 0) + 1
+
+    def observe_completed(self, message):
+        """汇总任务完成消息中的耗时统计"""
+        with self.lock:
+            self.jobs['completed'] = self.jobs.get('completed', 0) + 1
+            self.slides += message.get('total_slides', 0)
+            self.slide_cache_hits += message.get('slide_cache_hits', 0)
+            self.text_blocks += message.get('text_blocks', 0)
+            for stage, seconds in message.get('timings', {}).items():
+                self.stage_seconds.observe(stage, seconds)
+            for timing in message.get('slide_timings', []):
+                if timing['cached']:
+                    continue
+                for stage in ('parse', 'sort', 'write'):
+                    self.slide_seconds.observe(stage, timing[stage])
+
+    def render(self, queued, active):
+        with self.lock:
+            lines = [
+                '# HELP ppt_jobs_total 提取任务数（按结果分类）',
+                '# TYPE ppt_jobs_total counter',
+            ]
+            for result, count in sorted(self.jobs.items()):
+                lines.append(f'ppt_jobs_total{{result="{result}"}} {count}')
+            lines += [
+                '# HELP ppt_jobs_queued 排队等待中的任务数',
+                '# TYPE ppt_jobs_queued gauge',
+                f'ppt_jobs_queued {queued}',
+                '# HELP ppt_jobs_active 正在执行的任务数',
+                '# TYPE ppt_jobs_active gauge',
+                f'ppt_jobs_active {active}',
+                '# HELP ppt_slides_total 已处理的幻灯片页数',
+                '# TYPE ppt_slides_total counter',
+                f'ppt_slides_total {self.slides}',
+                '# HELP ppt_slide_cache_hits_total 复用单页缓存的页数',
+                '# TYPE ppt_slide_cache_hits_total counter',
+                f'ppt_slide_cache_hits_total {self.slide_cache_hits}',
+                '# HELP ppt_text_blocks_total 已提取的文本块数',
+                '# TYPE ppt_text_blocks_total counter',
+                f'ppt_text_blocks_total {self.text_blocks}',
+            ]
+            lines += self.stage_seconds.render()
+            lines += self.slide_seconds.render()
+        return '\n'.join(lines) + '\n'
+
+
+metrics = ServerMetrics()
+
+
+class TaskProgress:
+    """单个任务的进度状态：只保存最新一条消息及其事件ID"""
+
+    def __init__(self, lock):
+        self.changed = threading.Condition(lock)
+        self.waiters = set()  # asyncio 观察者 (事件循环, future)
+        self.event_id = 0
+        self.data = None
+        self.touched = time.monotonic()
+        self.watchers = 0
+
+    def notify(self):
+        """唤醒线程观察者和 asyncio 观察者（调用方持有锁）；每个事件循环只调度一次回调"""
+        self.changed.notify_all()
+        loops = {}
+        for loop, waiter in self.waiters:
+            loops.setdefault(loop, []).append(waiter)
+        self.waiters.clear()
+        for loop, waiters in loops.items():
+            try:
+                loop.call_soon_threadsafe(resolve_waiters, waiters)
+            except RuntimeError:
+                pass  # 事件循环已关闭
+
+
+def resolve_waiters(waiters):
+    for waiter in waiters:
+        if not waiter.done():
+            waiter.set_result(None)
+
+
+class ProgressBoard:
+    """
+    SSE 进度状态表，所有观察者共享同一份任务状态
+    进度消息是状态快照，每个任务只保留最新一条：慢速客户端直接跳到最新状态，逐页更新自然合并；
+    断线重连的浏览器携带 Last-Event-ID，只会收到更新的消息；
+    超过 ttl 秒无更新且无人读取的任务状态（包括无人取走结果的已结束任务）被清理
+    """
+
+    SWEEP_INTERVAL = 30
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.tasks = {}
+        self.last_sweep = time.monotonic()
+
+    def __contains__(self, task_id):
+        with self.lock:
+            return task_id in self.tasks
+
+    def create(self, task_id):
+        with self.lock:
+            self.tasks[task_id] = TaskProgress(self.lock)
+            self._sweep()
+
+    def discard(self, task_id):
+        with self.lock:
+            task = self.tasks.pop(task_id, None)
+            if task is not None:
+                task.notify()
+
+    def publish(self, task_id, data):
+        """更新任务状态并唤醒该任务的观察者；未知任务和已结束任务的消息被忽略"""
+        with self.lock:
+            task = self.tasks.get(task_id)
+            if task is None or (task.data is not None and task.data.get('status') in FINAL_STATUSES):
+                return
+            task.event_id += 1
+            task.data = data
+            task.touched = time.monotonic()
+            task.notify()
+            self._sweep()
+
+    def wait(self, task_id, last_event_id, timeout):
+        """
+        等待比 last_event_id 更新的消息，返回 (事件ID, 消息)，超时返回 (None, None)
+        任务不存在或已被清理时抛出 KeyError
+        """
+        with self.lock:
+            task = self.tasks.get(task_id)
+            if task is None:
+                raise KeyError(task_id)
+            task.watchers += 1
+            try:
+                task.changed.wait_for(
+                    lambda: task.event_id > last_event_id or self.tasks.get(task_id) is not task, timeout)
+            finally:
+                task.watchers -= 1
+            task.touched = time.monotonic()
+            if self.tasks.get(task_id) is not task:
+                raise KeyError(task_id)
+            if task.event_id > last_event_id:
+                return task.event_id, task.data
+            return None, None
+
+    async def wait_async(self, task_id, last_event_id, timeout):
+        """
+        wait() 的 asyncio 版本：观察者是事件循环中的一个 future，不占用线程；
+        publish 在其他线程中调用时通过 call_soon_threadsafe 唤醒
+        """
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            task = self.tasks.get(task_id)
+            if task is None:
+                raise KeyError(task_id)
+            waiter = None
+            if task.event_id <= last_event_id:
+                waiter = loop.create_future()
+                task.waiters.add((loop, waiter))
+                task.watchers += 1
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(waiter, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self.lock:
+                    task.watchers -= 1
+                    task.waiters.discard((loop, waiter))
+        with self.lock:
+            task.touched = time.monotonic()
+            if self.tasks.get(task_id) is not task:
+                raise KeyError(task_id)
+            if task.event_id > last_event_id:
+                return task.event_id, task.data
+            return None, None
+
+    def expire(self):
+        """立即清理过期的任务状态，返回清理的数量"""
+        with self.lock:
+            self.last_sweep = 0
+            return self._sweep()
+
+    def _sweep(self):
+        """清理过期任务（调用方持有锁），最多每 SWEEP_INTERVAL 秒执行一次"""
+        now = time.monotonic()
+        if now - self.last_sweep < self.SWEEP_INTERVAL:
+            return 0
+        self.last_sweep = now
+        expired = [task_id for task_id, task in self.tasks.items()
+                   if task.watchers == 0 and now - task.touched > self.ttl]
+        for task_id in expired:
+            del self.tasks[task_id]
+        if expired:
+            logger.info("🧹 清理 %d 个过期的进度状态", len(expired))
+        return len(expired)
+
+
+progress_board = ProgressBoard(app.config['PROGRESS_TTL'])
+
+
+class FileLeases:
+    """正在使用的文件（接收中的上传、任务读写的文件、下载中的文档），后台清理时跳过"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def acquire(self, *paths):
+        with self.lock:
+            for path in paths:
+                path = os.path.abspath(path)
+                self.counts[path] = self.counts.get(path, 0) + 1
+
+    def release(self, *paths):
+        with self.lock:
+            for path in paths:
+                path = os.path.abspath(path)
+                count = self.counts.get(path, 0) - 1
+                if count > 0:
+                    self.counts[path] = count
+                else:
+                    self.counts.pop(path, None)
+
+    def __contains__(self, path):
+        with self.lock:
+            return os.path.abspath(path) in self.counts
+
+
+file_leases = FileLeases()
+
+
+class BoardProgress:
+    """本进程中的进度队列：消息直接写入进度状态表"""
+
+    def __init__(self, task_id):
+        self.task_id = task_id
+
+    def put(self, data):
+        progress_board.publish(self.task_id, data)
+
+
+class JobProgress:
+    """任务进程中的进度队列：消息经共享队列转发回主进程"""
+
+    def __init__(self, task_id):
+        self.task_id = task_id
+
+    def put(self, data):
+        job_events.put((self.task_id, data))
+
+
+class JobScheduler:
+    """
+    提取任务调度器：有界进程池 + 先进先出排队
+    排队中的任务通过 SSE 进度流报告排队位置，排队已满时拒绝新任务
+    """
+
+    def __init__(self, max_active, max_queued):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.lock = threading.Lock()
+        self.waiting = []     # 已提交、尚未开始的任务（FIFO）
+        self.running = set()  # 正在执行的任务
+        self.leases = {}      # 任务占用的文件，任务结束时释放
+        self.cache_keys = {}  # 任务的结果缓存键：完成消息回到主进程后在此写入缓存（与查询共用 cache_lock）
+        self.events = multiprocessing.Queue()
+        self.pool = self._create_pool()
+        threading.Thread(target=self._dispatch_events, daemon=True).start()
+
+    def _create_pool(self):
+        return ProcessPoolExecutor(max_workers=self.max_active, initializer=init_job_process,
+                                   initargs=(self.events,))
+
+    def submit(self, task_id, *args, leases=(), cache_key=None, **kwargs):
+        """
+        提交任务，排队已满时返回 False；leases 中的文件在任务结束前不会被后台清理
+        提供 cache_key 时，任务成功后由主进程把生成的文档写入结果缓存
+        """
+        with self.lock:
+            if len(self.waiting) + len(self.running) >= self.max_active + self.max_queued:
+                return False
+            # 先提交再登记：提交失败时不会留下排队记录和文件占用
+            try:
+                future = self.pool.submit(run_extract_job, task_id, *args, **kwargs)
+            except BrokenProcessPool:
+                # 任务进程异常退出（如内存不足被杀）后进程池不再可用，重新创建
+                logger.error("任务进程池已损坏，重新创建")
+                self.pool.shutdown(wait=False)
+                self.pool = self._create_pool()
+                future = self.pool.submit(run_extract_job, task_id, *args, **kwargs)
+            self.waiting.append(task_id)
+            self.leases[task_id] = leases
+            if cache_key:
+                self.cache_keys[task_id] = cache_key
+            file_leases.acquire(*leases)
+        future.add_done_callback(lambda f: self._finished(task_id, f))
+        self._report_positions()
+        return True
+
+    def _dispatch_events(self):
+        """把任务进程的进度消息转发到进度状态表；任务的第一条消息表示已开始执行"""
+        while True:
+            task_id, data = self.events.get()
+            status = data.get('status')
+            with self.lock:
+                started = task_id in self.waiting
+                if started:
+                    self.waiting.remove(task_id)
+                    self.running.add(task_id)
+                cache_key = self.cache_keys.pop(task_id, None) if status in FINAL_STATUSES else None
+            if started:
+                self._report_positions()
+            if status == 'completed':
+                metrics.observe_completed(data)
+            elif status == 'error':
+                metrics.count_job('error')
+            progress_board.publish(task_id, data)
+            if status == 'completed' and cache_key:
+                try:
+                    cache_store(cache_key, os.path.join(task_export_dir(task_id), data['filename']),
+                                data['total_slides'], data['text_blocks'])
+                except Exception as e:
+                    logger.warning("写入结果缓存失败: %s", e)
+
+    def _finished(self, task_id, future):
+        with self.lock:
+            self.running.discard(task_id)
+            if task_id in self.waiting:
+                self.waiting.remove(task_id)
+            file_leases.release(*self.leases.pop(task_id, ()))
+        error = None if future.cancelled() else future.exception()
+        if error is not None:
+            # 任务进程异常退出，不会再有完成消息
+            with self.lock:
+                self.cache_keys.pop(task_id, None)
+            logger.error("提取任务异常退出: %s", error)
+            metrics.count_job('error')
+            progress_board.publish(task_id, {'status': 'error', 'message': f'提取失败: {str(error)}'})
+        self._report_positions()
+
+    def _report_positions(self):
+        """向仍在排队的任务推送当前排队位置"""
+        with self.lock:
+            # 有空闲进程时，排在最前面的任务即将开始，不算排队
+            free = max(0, self.max_active - len(self.running))
+            waiting = self.waiting[free:]
+        for position, task_id in enumerate(waiting, 1):
+            progress_board.publish(task_id, {
+                'status': 'queued',
+                'percent': 0,
+                'position': position,
+                'message': f'排队中，前面还有 {position - 1} 个任务...' if position > 1 else '排队中，等待当前任务完成...'
+            })
+
+
+def get_scheduler():
+    """返回全局任务调度器，首次调用时按配置创建"""
+    global scheduler
+    with scheduler_lock:
+        if scheduler is None:
+            scheduler = JobScheduler(app.config['MAX_CONCURRENT_JOBS'], app.config['MAX_QUEUED_JOBS'])
+        return scheduler
+
+
+def init_job_process(events):
+    """任务进程初始化：保存进度消息队列，沿用主进程的日志级别"""
+    global job_events
+    job_events = events
+    logging.basicConfig(level=os.environ.get('PPT_LOG_LEVEL', 'INFO').upper(),
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+
+def run_extract_job(task_id, *args, **kwargs):
+    """在任务进程中执行提取，进度经共享队列回传"""
+    extract_worker(task_id, *args, progress_queue=JobProgress(task_id), **kwargs)
 
 @app.route('/')
 def index():
@@ -39,90 +539,327 @@ def index():
 @app.route('/extract', methods=['POST'])
 def extract_file():
     """启动提取任务并返回任务ID"""
-    if 'file' not in request.files:
+    # 流式接收上传文件，不合法的文件在传输完成前即被拒绝
+    try:
+        form, upload = receive_upload(app.config['UPLOAD_FOLDER'])
+    except UploadRejected as e:
+        return jsonify({'error': str(e)}), 400
+
+    if upload is None:
         return jsonify({'error': '没有上传文件'}), 400
 
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': '未选择文件'}), 400
-
-    if file and file.filename.endswith('.pptx'):
-        filename = secure_filename(file.filename)
-        upload_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(upload_path)
-
-        # 获取选项
-        column_sort = request.form.get('column_sort', 'true') == 'true'
-        keep_format = request.form.get('keep_format', 'true') == 'true'
-
-        # 生成任务ID
-        task_id = str(uuid.uuid4())
-        progress_queues[task_id] = queue.Queue()
-
-        # 在后台线程中执行提取
-        thread = threading.Thread(
-            target=extract_worker,
-            args=(task_id, upload_path, filename, column_sort, keep_format)
-        )
-        thread.daemon = True
-        thread.start()
-
-        return jsonify({
-            'success': True,
-            'task_id': task_id
-        })
+    filename = secure_filename(upload['filename'])
+    upload_path = upload['path']
+
+    # 获取选项
+    column_sort = form.get('column_sort', 'true') == 'true'
+    keep_format = form.get('keep_format', 'true') == 'true'
+    notes_only = form.get('notes_only', 'false') == 'true'
+    output_format = form.get('format', 'docx')
+    if output_format not in SmartPPTExtractor.OUTPUT_FORMATS:
+        remove_upload(upload_path)
+        return jsonify({'error': f'不支持的输出格式: {output_format}'}), 400
+    layout = form.get('layout', 'columns')
+    if layout not in SmartPPTExtractor.LAYOUTS:
+        remove_upload(upload_path)
+        return jsonify({'error': f'不支持的阅读顺序: {layout}'}), 400
+    boilerplate = form.get('boilerplate', 'keep')
+    if boilerplate not in SmartPPTExtractor.BOILERPLATE_MODES:
+        remove_upload(upload_path)
+        return jsonify({'error': f'不支持的重复内容处理方式: {boilerplate}'}), 400
+    try:
+        boilerplate_ratio = float(form.get('boilerplate_ratio', BOILERPLATE_RATIO))
+    except ValueError:
+        boilerplate_ratio = -1
+    if not 0 <= boilerplate_ratio < 1:
+        remove_upload(upload_path)
+        return jsonify({'error': '重复内容的页面比例需在 0 到 1 之间'}), 400
+    # 只提取部分页面：slides 为页码范围（如 1-5,8,12-），sections 为节名（多个用换行分隔），两者取并集
+    slides = form.get('slides', '').strip() or None
+    if slides is not None:
+        try:
+            parse_slide_ranges(slides)
+        except ValueError as e:
+            remove_upload(upload_path)
+            return jsonify({'error': str(e)}), 400
+    sections = [name.strip() for name in form.get('sections', '').splitlines() if name.strip()] or None
+
+    # 生成任务ID
+    task_id = str(uuid.uuid4())
+    progress_board.create(task_id)
+    task_dir = task_export_dir(task_id)
+
+    # 命中缓存时直接返回已生成的文档，不再重新提取
+    # 低内存模式使用不同的提取引擎和写入器，生成的文档不同
+    engine, writer = ('xml', 'xml') if app.config['LOW_MEMORY'] else ('pptx', 'docx')
+    cache_key = result_cache_key(upload['sha256'], column_sort, keep_format, output_format, layout,
+                                 boilerplate, boilerplate_ratio, notes_only, slides, sections, engine, writer)
+    cached = cache_lookup(cache_key)
+    if cached:
+        try:
+            output_path = os.path.join(task_dir, cached['filename'])
+            file_leases.acquire(task_dir)
+            try:
+                os.makedirs(task_dir, exist_ok=True)
+                write_atomic(output_path, lambda path: shutil.copyfile(cached['path'], path))
+            finally:
+                file_leases.release(task_dir)
+            progress_board.publish(task_id, completed_message(task_id, output_path, cached['total_slides'],
+                                                              cached['text_blocks'], cached=True))
+            metrics.count_job('cached')
+        except OSError as e:
+            logger.warning("读取缓存失败，重新提取: %s", e)
+        else:
+            remove_upload(upload_path)
+            return jsonify({
+                'success': True,
+                'task_id': task_id
+            })
 
-    return jsonify({'error': '不支持的文件格式，仅支持 .pptx'}), 400
+    # 提交到任务进程池排队执行，排队已满时拒绝
+    try:
+        submitted = get_scheduler().submit(task_id, upload_path, filename, column_sort, keep_format,
+                                           output_format=output_format, layout=layout, boilerplate=boilerplate,
+                                           boilerplate_ratio=boilerplate_ratio, notes_only=notes_only,
+                                           slides=slides, sections=sections, cache_key=cache_key,
+                                           leases=(upload_path, task_dir))
+    except Exception as e:
+        logger.exception("提交提取任务失败: %s", e)
+        progress_board.discard(task_id)
+        metrics.count_job('error')
+        remove_upload(upload_path)
+        return jsonify({'error': '提交任务失败，请稍后重试'}), 500
+    if not submitted:
+        progress_board.discard(task_id)
+        metrics.count_job('rejected')
+        remove_upload(upload_path)
+        return jsonify({'error': '服务器繁忙，请稍后重试'}), 429
+
+    # 上传文件已交给任务（任务持有自己的占用），释放接收时的占用
+    file_leases.release(upload_path)
+    return jsonify({
+        'success': True,
+        'task_id': task_id
+    })
+
+def remove_upload(upload_path):
+    """删除不再需要的上传文件并释放占用"""
+    try:
+        os.remove(upload_path)
+    except OSError:
+        pass
+    file_leases.release(upload_path)
+
+def task_export_dir(task_id):
+    """任务的独立输出目录，不同任务上传同名文件时互不覆盖"""
+    return os.path.join(app.config['EXPORT_FOLDER'], task_id)
+
+def export_path(task_id, filename, extension='.docx'):
+    """上传文件对应的输出路径，extension 为输出格式的扩展名"""
+    base_name = os.path.splitext(filename)[0]
+    return os.path.join(task_export_dir(task_id), f"{base_name}_提取{extension}")
+
+def find_export(task_id):
+    """查找任务生成的文档，task_id 不合法或文档不存在（未完成或已清理）时返回 None"""
+    try:
+        if str(uuid.UUID(task_id)) != task_id:
+            return None
+    except ValueError:
+        return None
+    for entry in scandir_files(task_export_dir(task_id)):
+        if not entry.name.endswith('.partial'):
+            return entry.path
+    return None
 
-def extract_worker(task_id, upload_path, filename, column_sort, keep_format):
-    """后台提取任务"""
+def write_atomic(output_path, write):
+    """先由 write(临时路径) 写入同目录下的临时文件，完成后重命名为 output_path，读者不会看到写了一半的文件"""
+    partial_path = output_path + '.partial'
+    try:
+        result = write(partial_path)
+        os.replace(partial_path, output_path)
+    except BaseException:
+        try:
+            os.remove(partial_path)
+        except OSError:
+            pass
+        raise
+    return result
+
+class UploadRejected(Exception):
+    """上传内容不合法，停止接收"""
+
+def iter_request_chunks(stream, chunk_size):
+    """按块读取请求体，结束时产生 None（通知解析器数据已完整）"""
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        yield data
+    yield None
+
+def receive_upload(upload_folder):
+    """
+    流式解析 multipart 请求：上传文件按块直接写入磁盘，同时增量计算 SHA-256，
+    内存占用只与块大小有关；文件名或文件头不是 .pptx 时立即拒绝，不再继续接收
+    返回 (form, upload)，upload 为 {'filename', 'path', 'sha256', 'size'}，没有上传文件时为 None
+    返回的上传文件处于占用状态（file_leases），调用方用完后负责释放
+    """
+    _, options = parse_options_header(request.content_type or '')
+    boundary = options.get('boundary')
+    if not boundary:
+        return {}, None
+
+    # 解析器缓冲区最多容纳一个读取块加上未处理的尾部数据
+    decoder = MultipartDecoder(boundary.encode('latin-1'), app.config['UPLOAD_CHUNK_SIZE'] * 2, max_parts=16)
+    form = {}
+    upload = None
+    part = None
+    field_data = None   # 当前普通字段的内容
+    out = None          # 当前正在写入的上传文件
+    digest = hashlib.sha256()
+    head = b''
+
+    try:
+        for chunk in iter_request_chunks(request.stream, app.config['UPLOAD_CHUNK_SIZE']):
+            decoder.receive_data(chunk)
+            event = decoder.next_event()
+            while not isinstance(event, (Epilogue, NeedData)):
+                if isinstance(event, Field):
+                    part, field_data = event, []
+                elif isinstance(event, File):
+                    part, field_data = event, None
+                    if event.name == 'file' and upload is None:
+                        if event.filename == '':
+                            raise UploadRejected('未选择文件')
+                        if not event.filename.endswith('.pptx'):
+                            raise UploadRejected('不支持的文件格式，仅支持 .pptx')
+                        fd, path = tempfile.mkstemp(dir=upload_folder, suffix='.pptx')
+                        file_leases.acquire(path)
+                        out = os.fdopen(fd, 'wb')
+                        upload = {'filename': event.filename, 'path': path, 'size': 0}
+                elif isinstance(event, Data):
+                    if field_data is not None:
+                        field_data.append(event.data)
+                        if sum(len(d) for d in field_data) > app.config['MAX_FORM_FIELD_SIZE']:
+                            raise RequestEntityTooLarge()
+                    elif out is not None:
+                        # 收到文件头后立即校验 ZIP 签名
+                        if len(head) < len(ZIP_MAGIC):
+                            head += event.data[:len(ZIP_MAGIC) - len(head)]
+                            if len(head) == len(ZIP_MAGIC) and head != ZIP_MAGIC:
+                                raise UploadRejected('文件内容不是有效的 .pptx')
+                        out.write(event.data)
+                        digest.update(event.data)
+                        upload['size'] += len(event.data)
+
+                    if not event.more_data:
+                        if field_data is not None:
+                            form[part.name] = b''.join(field_data).decode('utf-8', 'replace')
+                        elif out is not None:
+                            out.close()
+                            out = None
+                event = decoder.next_event()
+
+        if upload is not None:
+            if out is not None:
+                raise UploadRejected('上传不完整')
+            # 传输完成后读取 ZIP 中央目录，确认是 PowerPoint 文件
+            validate_pptx(upload['path'])
+            upload['sha256'] = digest.hexdigest()
+    except BaseException:
+        if out is not None:
+            out.close()
+        if upload is not None:
+            remove_upload(upload['path'])
+        raise
+
+    return form, upload
+
+def validate_pptx(path):
+    """通过 ZIP 中央目录校验文件是 .pptx"""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            names = set(zf.namelist())
+    except zipfile.BadZipFile:
+        raise UploadRejected('文件内容不是有效的 .pptx')
+    if '[Content_Types].xml' not in names or 'ppt/presentation.xml' not in names:
+        raise UploadRejected('文件不是 PowerPoint 演示文稿')
+
+def extract_worker(task_id, upload_path, filename, column_sort, keep_format, output_format='docx', layout='columns',
+                   boilerplate='keep', boilerplate_ratio=BOILERPLATE_RATIO, notes_only=False, slides=None,
+                   sections=None, workers=None, cache_key=None, progress_queue=None):
+    """
+    后台提取任务，workers 为并行提取的进程数（默认读取 EXTRACT_WORKERS 配置）
+    output_format 为输出格式（见 SmartPPTExtractor.OUTPUT_FORMATS），layout 为阅读顺序（见 SmartPPTExtractor.LAYOUTS）
+    boilerplate / boilerplate_ratio 为跨页重复内容的处理方式和页面比例（见 SmartPPTExtractor），
+    notes_only 为 True 时只导出演讲备注，slides / sections 为要提取的页码范围和节名（None 表示全部页面）
+    提供 cache_key 时，成功生成的文档会写入结果缓存（仅用于在主进程中直接调用；
+    经调度器执行的任务由 JobScheduler 在收到完成消息后写入，与查询、淘汰共用 cache_lock）
+    progress_queue 默认直接写入本进程的进度状态表
+    """
+    if workers is None:
+        workers = app.config['EXTRACT_WORKERS']
+    if progress_queue is None:
+        progress_queue = BoardProgress(task_id)
     try:
-        progress_queue = progress_queues[task_id]
 
         # 发送初始化消息
         progress_queue.put({'status': 'progress', 'percent': 0, 'message': '开始提取...'})
 
-        # 定义输出路径
-        base_name = os.path.splitext(filename)[0]
-        output_filename = f"{base_name}_提取.docx"
-        output_path = os.path.join(app.config['EXPORT_FOLDER'], output_filename)
+        # 定义输出路径（每个任务独立的目录）
+        output_path = export_path(task_id, filename, SmartPPTExtractor.OUTPUT_FORMATS[output_format][0])
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
         progress_queue.put({'status': 'progress', 'percent': 10, 'message': '打开 PPT 文件...'})
 
         # 初始化提取器
-        extractor = SmartPPTExtractor(upload_path)
+        extractor = SmartPPTExtractor(upload_path, slide_cache=app.config['SLIDE_CACHE_PATH'],
+                                      low_memory=app.config['LOW_MEMORY'], output_format=output_format,
+                                      layout=layout, boilerplate=boilerplate, boilerplate_ratio=boilerplate_ratio,
+                                      notes_only=notes_only, slides=slides, sections=sections)
+
+        total_slides = extractor.slide_count
+        if extractor.selected is not None:
+            message = f'选中 {total_slides}/{extractor.total_slides} 页幻灯片...'
+        else:
+            message = f'发现 {total_slides} 页幻灯片...'
+        progress_queue.put({'status': 'progress', 'percent': 20, 'message': message})
 
-        total_slides = len(extractor.prs.slides)
-        progress_queue.put({'status': 'progress', 'percent': 20, 'message': f'发现 {total_slides} 页幻灯片...'})
+        # 定义进度回调函数：百分比不变时限制发送频率，页数很多时不会产生大量消息
+        last_percent = None
+        last_sent = 0.0
 
-        # 定义进度回调函数
         def progress_callback(current_slide, total, message):
+            nonlocal last_percent, last_sent
             percent = 20 + int((current_slide / total) * 70)
+            now = time.monotonic()
+            if percent == last_percent and now - last_sent < PROGRESS_MIN_INTERVAL:
+                return
+            last_percent, last_sent = percent, now
             progress_queue.put({'status': 'progress', 'percent': percent, 'message': message})
 
-        # 提取文案（添加进度回调）
-        extractor.export_to_word_with_progress(output_path, progress_callback)
+        # 提取文案（添加进度回调），写完后才重命名为最终文件名
+        try:
+            stats = write_atomic(output_path, lambda path: extractor.export_to_word_with_progress(
+                path, progress_callback, workers=workers))
+        finally:
+            extractor.close()
+        text_blocks = stats['text_blocks']
 
         progress_queue.put({'status': 'progress', 'percent': 95, 'message': '生成 Word 文档...'})
 
-        # 获取统计信息
-        file_size = os.path.getsize(output_path)
+        if cache_key:
+            cache_store(cache_key, output_path, total_slides, text_blocks)
 
         # 发送完成消息
-        progress_queue.put({
-            'status': 'completed',
-            'percent': 100,
-            'filename': output_filename,
-            'total_slides': total_slides,
-            'text_blocks': 0,  # 可以从提取器获取
-            'file_size': format_size(file_size),
-            'download_url': f"/download/{output_filename}"
-        })
+        message = completed_message(task_id, output_path, total_slides, text_blocks, stats=stats)
+        message['slide_cache_hits'] = stats['cache_hits']
+        if boilerplate != 'keep':
+            message['boilerplate_removed'] = stats['boilerplate_removed']
+        progress_queue.put(message)
 
     except Exception as e:
-        print(f"提取错误: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("提取错误: %s", e)
         progress_queue.put({
             'status': 'error',
             'message': f'提取失败: {str(e)}'
@@ -137,43 +874,191 @@ def extract_worker(task_id, upload_path, filename, column_sort, keep_format):
 
 @app.route('/progress/<task_id>')
 def progress(task_id):
-    """SSE 进度流"""
+    """
+    SSE 进度流：每条消息带事件ID，断线重连时浏览器通过 Last-Event-ID 续传
+    多个客户端可以同时观察同一任务
+    每个观察者占用一个线程；设置 PPT_ASYNC_SSE=1 时请求行可识别的进度流改由 sse_server 的事件循环处理
+    """
+    last_event_id = parse_last_event_id(request.headers.get('Last-Event-ID'))
+
     def generate():
-        if task_id not in progress_queues:
-            import json
-            yield f"data: {json.dumps({'status': 'error', 'message': '任务不存在'})}\n\n"
+        last_id = last_event_id
+        yield f"retry: {PROGRESS_RETRY_MS}\n\n"
+        while True:
+            try:
+                event_id, data = progress_board.wait(task_id, last_id, PROGRESS_HEARTBEAT)
+            except KeyError:
+                yield sse_task_missing()
+                return
+
+            if event_id is None:
+                # 超时，发送注释行作为心跳
+                yield ": heartbeat\n\n"
+                continue
+
+            last_id = event_id
+            yield sse_event(event_id, data)
+
+            # 如果任务完成或出错，停止流（状态保留到过期，供重连的客户端读取）
+            if data.get('status') in FINAL_STATUSES:
+                break
+
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus 文本格式的服务指标"""
+    queued = active = 0
+    if scheduler is not None:
+        with scheduler.lock:
+            queued = len(scheduler.waiting)
+            active = len(scheduler.running)
+    return Response(metrics.render(queued, active), mimetype='text/plain; version=0.0.4')
+
+@app.route('/download/<task_id>')
+def download_file(task_id):
+    """
+    下载任务生成的文档：支持 Range 断点续传和 ETag/If-None-Match 条件请求
+    任务的文档生成后不再改变，允许代理在保留期内缓存
+    """
+    filepath = find_export(task_id)
+    if filepath is not None:
+        # 刷新任务目录的修改时间，容量超限时按最近下载时间淘汰（文件本身不变，ETag 保持稳定）；
+        # send_file 返回前已打开文件，之后即使被清理，已打开的文件仍可完整读出
+        task_dir = os.path.dirname(filepath)
+        file_leases.acquire(task_dir)
+        try:
+            os.utime(task_dir)
+            # mimetypes 不认识 .jsonl，其余格式按扩展名推断
+            mimetype = 'application/x-ndjson' if filepath.endswith('.jsonl') else None
+            return send_file(os.path.abspath(filepath), mimetype=mimetype, as_attachment=True,
+                             download_name=os.path.basename(filepath), conditional=True, etag=True,
+                             max_age=app.config['EXPORT_MAX_AGE'])
+        except FileNotFoundError:
+            pass
+        finally:
+            file_leases.release(task_dir)
+    return jsonify({'error': '文件不存在'}), 404
+
+def completed_message(task_id, output_path, total_slides, text_blocks, cached=False, stats=None):
+    """任务完成时推送给前端的消息；stats 为 export_to_word_with_progress 返回的统计信息，附带各阶段耗时"""
+    output_filename = os.path.basename(output_path)
+    message = {
+        'status': 'completed',
+        'percent': 100,
+        'filename': output_filename,
+        'total_slides': total_slides,
+        'text_blocks': text_blocks,
+        'file_size': format_size(os.path.getsize(output_path)),
+        'download_url': f"/download/{task_id}",
+        'cached': cached,
+    }
+    if stats is not None:
+        message['timings'] = {stage: round(seconds, 4) for stage, seconds in stats['timings'].items()}
+        message['slide_timings'] = [
+            {key: round(value, 4) if isinstance(value, float) else value for key, value in timing.items()}
+            for timing in stats['slide_timings']
+        ]
+    return message
+
+def result_cache_key(content_sha256, column_sort, keep_format, output_format='docx', layout='columns',
+                     boilerplate='keep', boilerplate_ratio=BOILERPLATE_RATIO, notes_only=False, slides=None,
+                     sections=None, engine='pptx', writer='docx'):
+    """
+    缓存键：结果格式版本 + 上传文件内容的哈希（接收时增量计算）+ 提取引擎和写入器 + 提取选项 + 输出格式
+    + 阅读顺序 + 重复内容处理 + 是否只导出备注 + 选中的页码范围和节
+    """
+    options = (f"{RESULT_CACHE_VERSION}|{content_sha256}|engine={engine}|writer={writer}"
+               f"|column_sort={column_sort}|keep_format={keep_format}")
+    # 默认选项不写入键；同一版本内新增选项时已有的缓存条目继续有效
+    if output_format != 'docx':
+        options += f"|format={output_format}"
+    if layout != 'columns':
+        options += f"|layout={layout}"
+    if boilerplate != 'keep':
+        options += f"|boilerplate={boilerplate}:{boilerplate_ratio}"
+    if notes_only:
+        options += "|notes_only"
+    if slides is not None:
+        options += f"|slides={slides}"
+    if sections:
+        options += "|sections=" + '\n'.join(sections)
+    return hashlib.sha256(options.encode()).hexdigest()
+
+def cache_lookup(cache_key):
+    """查找缓存结果，命中时刷新访问时间（LRU）并返回元数据"""
+    meta_path = os.path.join(app.config['CACHE_FOLDER'], f"{cache_key}.json")
+    with cache_lock:
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            data_path = cache_data_path(cache_key, meta['filename'])
+            if not os.path.exists(data_path):
+                return None
+            os.utime(data_path)
+            os.utime(meta_path)
+        except (OSError, ValueError, KeyError):
+            return None
+    meta['path'] = data_path
+    return meta
+
+def cache_data_path(cache_key, filename):
+    """缓存的文档路径：缓存键 + 输出文件的扩展名（.docx / .md / .txt / .jsonl）"""
+    return os.path.join(app.config['CACHE_FOLDER'], cache_key + os.path.splitext(filename)[1])
+
+def cache_store(cache_key, output_path, total_slides, text_blocks):
+    """将生成的文档写入缓存，并按时间/容量淘汰旧条目"""
+    data_path = cache_data_path(cache_key, output_path)
+    meta_path = os.path.join(app.config['CACHE_FOLDER'], f"{cache_key}.json")
+    meta = {
+        'filename': os.path.basename(output_path),
+        'total_slides': total_slides,
+        'text_blocks': text_blocks,
+    }
+
+    def write_meta(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    with cache_lock:
+        try:
+            # 先写文档再写元数据，均写入临时文件后重命名：查询到元数据时文档一定已完整
+            write_atomic(data_path, lambda path: shutil.copyfile(output_path, path))
+            write_atomic(meta_path, write_meta)
+        except OSError as e:
+            logger.warning("写入结果缓存失败: %s", e)
             return
+        evict_cache()
 
-        progress_queue = progress_queues[task_id]
+def evict_cache():
+    """淘汰过期缓存，再按最近使用时间淘汰直到总容量不超过上限（调用方持有 cache_lock）"""
+    cache_folder = app.config['CACHE_FOLDER']
+    now = time.time()
+    entries = []
+    for f in os.listdir(cache_folder):
+        # 缓存的文档（任意输出格式），跳过元数据、单页缓存数据库和写入中的临时文件
+        match = CACHE_ENTRY.match(f)
+        if match is None or match.group(2) == '.json':
+            continue
+        data_path = os.path.join(cache_folder, f)
+        meta_path = os.path.join(cache_folder, match.group(1) + '.json')
+        try:
+            stat = os.stat(data_path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, data_path, meta_path))
 
-        while True:
+    entries.sort()
+    total_size = sum(size for _, size, _, _ in entries)
+    for mtime, size, data_path, meta_path in entries:
+        if mtime >= now - app.config['CACHE_MAX_AGE'] and total_size <= app.config['CACHE_MAX_BYTES']:
+            break
+        for path in (meta_path, data_path):
             try:
-                # 等待新的进度更新
-                data = progress_queue.get(timeout=30)
-
-                import json
-                yield f"data: {json.dumps(data)}\n\n"
-
-                # 如果任务完成或出错，停止流
-                if data.get('status') in ['completed', 'error']:
-                    # 清理队列
-                    del progress_queues[task_id]
-                    break
-
-            except queue.Empty:
-                # 超时，发送心跳
-                import json
-                yield f"data: {json.dumps({'status': 'heartbeat'})}\n\n"
-
-    return Response(generate(), mimetype='text/event-stream')
-
-@app.route('/download/<filename>')
-def download_file(filename):
-    """下载文件接口"""
-    filepath = os.path.join(app.config['EXPORT_FOLDER'], filename)
-    if os.path.exists(filepath):
-        return send_file(filepath, as_attachment=True)
-    return jsonify({'error': '文件不存在'}), 404
+                os.remove(path)
+            except OSError:
+                pass
+        total_size -= size
 
 def format_size(size_bytes):
     """格式化文件大小"""
@@ -183,19 +1068,93 @@ def format_size(size_bytes):
         size_bytes /= 1024.0
     return f"{size_bytes:.2f} TB"
 
-def cleanup_old_files():
-    """清理旧文件（1小时前的）"""
+def cleanup_files():
+    """
+    清理上传和导出目录：删除超过保留时间的文件，导出目录再按最近使用时间淘汰直到不超过容量上限
+    导出目录中每个任务一个子目录，以子目录为单位淘汰（子目录的修改时间即最近使用时间）
+    正在使用的文件和任务目录（file_leases）不会被删除；返回删除的文件和目录数
+    """
     now = time.time()
-    for folder in [app.config['UPLOAD_FOLDER'], app.config['EXPORT_FOLDER']]:
-        if not os.path.exists(folder):
+    removed = 0
+
+    def remove(path, is_dir=False):
+        nonlocal removed
+        try:
+            if is_dir:
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+
+    for entry in scandir_files(app.config['UPLOAD_FOLDER']):
+        if entry.path not in file_leases and entry.stat().st_mtime < now - app.config['UPLOAD_MAX_AGE']:
+            remove(entry.path)
+
+    entries = []
+    total_size = 0
+    try:
+        with os.scandir(app.config['EXPORT_FOLDER']) as it:
+            export_entries = list(it)
+    except OSError:
+        export_entries = []
+    for entry in export_entries:
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            mtime = entry.stat(follow_symlinks=False).st_mtime
+            if is_dir:
+                size = sum(f.stat().st_size for f in scandir_files(entry.path))
+            else:
+                size = entry.stat(follow_symlinks=False).st_size
+        except OSError:
             continue
-        for f in os.listdir(folder):
-            f_path = os.path.join(folder, f)
-            try:
-                if os.stat(f_path).st_mtime < now - 3600:
-                    os.remove(f_path)
-            except:
-                pass
+        total_size += size
+        if entry.path not in file_leases:
+            entries.append((mtime, size, entry.path, is_dir))
+
+    entries.sort()
+    for mtime, size, path, is_dir in entries:
+        if mtime >= now - app.config['EXPORT_MAX_AGE'] and total_size <= app.config['EXPORT_MAX_BYTES']:
+            break
+        # 删除前再确认一次，避免清理期间任务刚开始写入或被下载
+        if path in file_leases:
+            continue
+        remove(path, is_dir)
+        total_size -= size
+
+    return removed
+
+def scandir_files(folder):
+    """列出目录中的普通文件（目录不存在时为空）"""
+    try:
+        with os.scandir(folder) as it:
+            return [entry for entry in it if entry.is_file(follow_symlinks=False)]
+    except OSError:
+        return []
+
+def run_janitor():
+    """后台清理循环：定期清理上传/导出文件、过期的结果缓存和进度状态"""
+    while True:
+        time.sleep(app.config['JANITOR_INTERVAL'])
+        try:
+            removed = cleanup_files()
+            with cache_lock:
+                evict_cache()
+            expired = progress_board.expire()
+            if removed:
+                logger.info("🧹 后台清理删除 %d 个文件", removed)
+            logger.debug("后台清理完成：删除文件 %d 个，过期进度状态 %d 个", removed, expired)
+        except Exception as e:
+            logger.warning("后台清理失败: %s", e)
+
+def start_janitor():
+    """启动后台清理线程（只启动一次）"""
+    global janitor_started
+    with janitor_lock:
+        if not janitor_started:
+            threading.Thread(target=run_janitor, daemon=True).start()
+            janitor_started = True
 
 def open_browser(port=5002):
     """等待服务器启动后自动打开浏览器"""
@@ -209,6 +1168,10 @@ def main():
     """主函数"""
     port = 5002
 
+    # 默认 INFO 级别：逐形状的 DEBUG 诊断不会被格式化；排查问题时设置 PPT_LOG_LEVEL=DEBUG
+    logging.basicConfig(level=os.environ.get('PPT_LOG_LEVEL', 'INFO').upper(),
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
     # 启动时清理临时文件
     print("\n🧹 清理临时文件...")
     if os.path.exists(app.config['UPLOAD_FOLDER']):
@@ -230,12 +1193,18 @@ def main():
     print("   - 服务器运行时请保持此窗口打开")
     print("="*60 + "\n")
 
+    # 后台定期清理上传、导出文件和过期缓存
+    start_janitor()
+
     # 在新线程中打开浏览器
     threading.Thread(target=open_browser, args=(port,), daemon=True).start()
 
-    # 启动 Flask 服务器
+    # 启动 Flask 服务器；PPT_ASYNC_SSE=1 时进度流由 asyncio 前端处理（限制见 sse_server.py）
     try:
-        app.run(host='127.0.0.1', port=port, debug=False, threaded=True)
+        if app.config['ASYNC_SSE']:
+            sse_server.serve(app, progress_board, '127.0.0.1', port)
+        else:
+            app.run(host='127.0.0.1', port=port, debug=False, threaded=True)
     except KeyboardInterrupt:
         print("\n\n👋 服务器已停止\n")
         sys.exit(0)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SSE 进度流的格式，以及可选的 asyncio 前端（设置环境变量 PPT_ASYNC_SSE=1 启用）
+默认由 Flask 的 /progress 路由发送进度流，每个观察者占用一个 WSGI 线程；
+启用后 asyncio 事件循环接受所有连接，/progress 以协程处理，数千个观察者不占用线程，
+其余请求仍交给 Werkzeug 的多线程 WSGI 服务器。
+
+asyncio 前端的限制（只适合直接面向浏览器的本机服务）：
+- 用 MSG_PEEK 偷看原始请求行、按正则识别 GET /progress/<任务ID>：HEAD 请求、绝对形式的请求目标，
+  以及反向代理改写路径（如加前缀）后的请求都识别不到，退回 WSGI 线程中的 /progress 路由
+- 进度流的响应头是手写的，不经过 Flask：中间件、after_request 钩子对它不生效
+- 为了让每个请求都先经过分派，所有连接都按 HTTP/1.0 处理，每个连接只处理一个请求，没有 keep-alive
+"""
+
+import asyncio
+import errno
+import json
+import logging
+import re
+import socket
+
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+logger = logging.getLogger(__name__)
+
+# SSE 心跳间隔（秒）与客户端断线后的重连间隔（毫秒）
+PROGRESS_HEARTBEAT = 30
+PROGRESS_RETRY_MS = 3000
+# 任务结束的消息状态：进度流发送这些状态的消息后结束
+FINAL_STATUSES = ('completed', 'error')
+# SSE 进度流的请求行（由事件循环直接处理）；连接建立后等待请求行的最长时间（秒）
+PROGRESS_REQUEST = re.compile(rb'GET /progress/([0-9A-Za-z-]+)(?:\?\S*)? HTTP/1\.[01]\r\n')
+REQUEST_LINE_TIMEOUT = 30
+MAX_REQUEST_HEAD = 64 * 1024
+# accept 失败后可以重试的错误（文件描述符或内存耗尽）及重试间隔（秒）
+ACCEPT_RETRY_ERRNOS = (errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM)
+ACCEPT_RETRY_DELAY = 1
+
+
+def parse_last_event_id(value):
+    try:
+        return int(value or 0)
+    except ValueError:
+        return 0
+
+
+def sse_task_missing():
+    return f"data: {json.dumps({'status': 'error', 'message': '任务不存在'})}\n\n"
+
+
+def sse_event(event_id, data):
+    return f"id: {event_id}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_progress(board, writer, task_id, last_event_id):
+    """在事件循环中发送 SSE 进度流，输出与 /progress 路由相同；观察者只是一个协程"""
+    writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n'
+                 b'Cache-Control: no-cache\r\nConnection: close\r\n\r\n')
+    writer.write(f"retry: {PROGRESS_RETRY_MS}\n\n".encode())
+    await writer.drain()
+    last_id = last_event_id
+    while True:
+        try:
+            event_id, data = await board.wait_async(task_id, last_id, PROGRESS_HEARTBEAT)
+        except KeyError:
+            writer.write(sse_task_missing().encode())
+            await writer.drain()
+            return
+
+        if event_id is None:
+            writer.write(b": heartbeat\n\n")
+        else:
+            last_id = event_id
+            writer.write(sse_event(event_id, data).encode())
+        # 客户端断开时 drain 抛出 ConnectionError，协程随之结束
+        await writer.drain()
+        if event_id is not None and data.get('status') in FINAL_STATUSES:
+            return
+
+
+class SingleRequestHandler(WSGIRequestHandler):
+    """
+    每个连接只处理一个请求（HTTP/1.0）：所有连接都先经过事件循环分派，
+    长连接上的后续请求（如 /progress）不会绕过分派落到 WSGI 线程上
+    """
+    protocol_version = 'HTTP/1.0'
+
+
+async def peek_request_line(loop, sock):
+    """等待请求行到达，返回已收到的数据；MSG_PEEK 不消费数据，交给 WSGI 服务器的连接仍是完整的请求"""
+    deadline = loop.time() + REQUEST_LINE_TIMEOUT
+    while True:
+        readable = loop.create_future()
+        loop.add_reader(sock.fileno(), lambda: readable.done() or readable.set_result(None))
+        try:
+            await asyncio.wait_for(readable, deadline - loop.time())
+        finally:
+            loop.remove_reader(sock.fileno())
+        data = sock.recv(MAX_REQUEST_HEAD, socket.MSG_PEEK)
+        if not data or b'\r\n' in data or len(data) >= MAX_REQUEST_HEAD:
+            return data
+        await asyncio.sleep(0.01)
+
+
+async def handle_connection(server, board, sock, address):
+    """SSE 进度流在事件循环中处理，其余请求交给 WSGI 服务器的线程"""
+    loop = asyncio.get_running_loop()
+    try:
+        head = await peek_request_line(loop, sock)
+    except (OSError, asyncio.TimeoutError):
+        sock.close()
+        return
+    match = PROGRESS_REQUEST.match(head)
+    if match is None:
+        if not head:
+            sock.close()
+            return
+        sock.setblocking(True)
+        server.process_request(sock, address)
+        return
+
+    reader, writer = await asyncio.open_connection(sock=sock, limit=MAX_REQUEST_HEAD)
+    try:
+        request_head = await reader.readuntil(b'\r\n\r\n')
+        last_event_id = 0
+        for line in request_head.decode('latin-1').split('\r\n')[1:]:
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'last-event-id':
+                last_event_id = parse_last_event_id(value.strip())
+        await stream_progress(board, writer, match.group(1).decode('ascii'), last_event_id)
+    except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        pass
+    except Exception as e:
+        logger.exception("进度流出错: %s", e)
+    finally:
+        writer.close()
+
+
+async def accept_connections(server, board):
+    """在事件循环中接受 WSGI 服务器监听套接字上的所有连接"""
+    loop = asyncio.get_running_loop()
+    listener = server.socket
+    listener.setblocking(False)
+    connections = set()
+    while True:
+        try:
+            sock, address = await loop.sock_accept(listener)
+        except ConnectionAbortedError:
+            continue  # 客户端在 accept 之前已断开
+        except OSError as e:
+            if e.errno not in ACCEPT_RETRY_ERRNOS:
+                raise
+            # 文件描述符或内存耗尽：与 asyncio 自带的服务器一样记录错误，稍后重试，已建立的连接不受影响
+            logger.error("⚠️ 接受连接失败: %s，%.1f 秒后重试", e, ACCEPT_RETRY_DELAY)
+            await asyncio.sleep(ACCEPT_RETRY_DELAY)
+            continue
+        task = loop.create_task(handle_connection(server, board, sock, address))
+        connections.add(task)
+        task.add_done_callback(connections.discard)
+
+
+def serve(app, board, host, port):
+    """
+    启动 HTTP 服务：asyncio 事件循环接受所有连接，/progress SSE 进度流以协程处理（读取 board 中的进度状态），
+    其余请求交给 Werkzeug 的多线程 WSGI 服务器
+    """
+    server = make_server(host, port, app, threaded=True, request_handler=SingleRequestHandler)
+    try:
+        asyncio.run(accept_connections(server, board))
+    finally:
+        server.server_close()
@@ -133,7 +133,7 @@ document.addEventListener('DOMContentLoaded', function() {
         eventSource.onmessage = (event) => {
             const data = JSON.parse(event.data);
 
-            if (data.status === 'progress') {
+            if (data.status === 'progress' || data.status === 'queued') {
                 updateProgress(data.percent, data.message);
             } else if (data.status === 'completed') {
                 eventSource.close();
@@ -153,6 +153,11 @@ document.addEventListener('DOMContentLoaded', function() {
         };
 
         eventSource.onerror = (error) => {
+            // 连接短暂中断时浏览器会携带 Last-Event-ID 自动重连，只有放弃重连时才提示错误
+            if (eventSource.readyState !== EventSource.CLOSED) {
+                console.warn('SSE 连接中断，正在重连...', error);
+                return;
+            }
             console.error('SSE Error:', error);
             eventSource.close();
             hideProgress();
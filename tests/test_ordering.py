@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+排序与去重相关改写的回归测试：结果必须与改写前的实现完全一致
+- column_based_sort：扫描线版本与原 O(n²) 逐列比较版本
+- xy_cut：split_python 与 split_numpy，以及整体阅读顺序
+- TextBoxCollector：元组去重键与原字符串去重键
+- parse_slide_ranges / select_slides 的边界情况
+"""
+
+import random
+
+import pytest
+from pptx import Presentation
+
+import xy_cut
+from extract_ppt import (COLUMN_TOLERANCE, SmartPPTExtractor, TextBox, TextBoxCollector, clean_text,
+                         parse_slide_ranges)
+
+
+def random_boxes(rng, count, spread=12192000):
+    """随机文本框；left 取自少量列位置加抖动，使列聚类、容差边界和相同 left 都会出现"""
+    anchors = [rng.randrange(spread) for _ in range(rng.randint(1, 8))]
+    boxes = []
+    for i in range(count):
+        left = rng.choice(anchors) + rng.randint(-2 * COLUMN_TOLERANCE, 2 * COLUMN_TOLERANCE)
+        boxes.append(TextBox(f"文本框{i}", left, rng.randrange(6858000), 12.0,
+                             width=rng.choice((0, None, rng.randrange(1, 3000000))),
+                             height=rng.randrange(1, 600000)))
+    return boxes
+
+
+def quadratic_column_sort(text_boxes, tolerance=COLUMN_TOLERANCE):
+    """改写前的列优先排序：每个文本框依次与所有已有列的平均 left 比较，归入第一个接近的列"""
+    columns = []
+    for box in sorted(text_boxes, key=lambda b: b.left):
+        for col in columns:
+            avg_left = sum(b.left for b in col) / len(col)
+            if abs(box.left - avg_left) < tolerance:
+                col.append(box)
+                break
+        else:
+            columns.append([box])
+    for col in columns:
+        col.sort(key=lambda b: b.top)
+    columns.sort(key=lambda col: min(b.left for b in col))
+    return [box for col in columns for box in col]
+
+
+def column_sort(text_boxes, **kwargs):
+    extractor = SmartPPTExtractor.__new__(SmartPPTExtractor)
+    return extractor.column_based_sort(text_boxes, **kwargs)
+
+
+@pytest.mark.parametrize('tolerance', [1, 100000, COLUMN_TOLERANCE, 2000000])
+def test_column_sort_matches_quadratic(tolerance):
+    rng = random.Random(tolerance)
+    for _ in range(300):
+        boxes = random_boxes(rng, rng.randint(0, 60))
+        expected = quadratic_column_sort(boxes, tolerance)
+        assert column_sort(boxes, tolerance=tolerance) == expected
+
+
+def test_column_sort_use_width_merges_overlapping_boxes():
+    # 第二个文本框的 left 超出容差，但落在第一个文本框的水平范围内
+    wide = TextBox("宽", 0, 100, 12.0, width=3000000)
+    inside = TextBox("内", 2000000, 0, 12.0, width=100)
+    right = TextBox("右", 5000000, 50, 12.0, width=100)
+    assert column_sort([right, inside, wide]) == [wide, inside, right]
+    assert column_sort([right, inside, wide], use_width=True) == [inside, wide, right]
+
+
+def random_extents(rng, count):
+    extents = []
+    for _ in range(count):
+        left, top = rng.randrange(0, 100000, 500), rng.randrange(0, 100000, 500)
+        extents.append((left, top, left + rng.randrange(1, 8000, 500), top + rng.randrange(1, 4000, 500)))
+    return extents
+
+
+def test_split_numpy_matches_python():
+    np = pytest.importorskip('numpy')
+    rng = random.Random(3)
+    for _ in range(500):
+        extents = random_extents(rng, rng.randint(1, 80))
+        starts, _, ends, _ = (list(column) for column in zip(*extents))
+        indices = sorted(rng.sample(range(len(extents)), rng.randint(1, len(extents))))
+        for min_gap in (0, 1000):
+            widest, segments = xy_cut.split_python(indices, starts, ends, min_gap)
+            np_widest, np_segments = xy_cut.split_numpy(np.array(indices), np.array(starts), np.array(ends),
+                                                        min_gap)
+            assert np_widest == widest
+            if segments is None:
+                assert np_segments is None
+            else:
+                assert [segment.tolist() for segment in np_segments] == segments
+
+
+def test_xy_cut_order_same_with_and_without_numpy(monkeypatch):
+    pytest.importorskip('numpy')
+    rng = random.Random(4)
+    cases = [random_extents(rng, rng.randint(0, 400)) for _ in range(40)]
+    monkeypatch.setattr(xy_cut, 'NUMPY_MIN_BOXES', 2)
+    with_numpy = [xy_cut.xy_cut_order(extents) for extents in cases]
+    monkeypatch.setattr(xy_cut, 'np', None)
+    assert [xy_cut.xy_cut_order(extents) for extents in cases] == with_numpy
+
+
+def test_collector_dedup_matches_string_keys():
+    rng = random.Random(5)
+    long_prefix = 'x' * 100
+    texts = ['标题', ' 标题 ', '正文\n第二行', '', '   ', long_prefix + '甲', long_prefix + '乙', '1_2', '2']
+    collector = TextBoxCollector()
+    expected = []
+    seen = set()
+    for _ in range(2000):
+        text = rng.choice(texts)
+        left = rng.choice((0, 1, 12, 1.5, 1.9, -3, 23))
+        top = rng.choice((0, 2, 3, 23, 2.7, -1))
+        collector.add(text, left, top, 12.0)
+        # 改写前：f"{int(left)}_{int(top)}_{text[:100]}" 字符串作为去重键
+        cleaned = clean_text(text.strip())
+        key = f"{int(left)}_{int(top)}_{cleaned[:100]}"
+        if cleaned and key not in seen:
+            seen.add(key)
+            expected.append((cleaned, left, top))
+    assert [(box.text, box.left, box.top) for box in collector.text_boxes] == expected
+
+
+def test_collector_dedup_table_and_text_share_keys():
+    collector = TextBoxCollector()
+    table = {'columns': [100, 100], 'row_heights': [50],
+             'rows': [[{'text': 'a'}, {'text': 'b'}]]}
+    collector.add_table(table, 10, 20)
+    collector.add_table(table, 10.4, 20.9)
+    collector.add('a\tb', 10, 20, 12.0)
+    assert len(collector.text_boxes) == 1
+    assert collector.text_boxes[0].table is table
+
+
+@pytest.mark.parametrize('spec, expected', [
+    ('1-5,8,12-', [(1, 5), (8, 8), (12, None)]),
+    ('-5', [(1, 5)]),
+    ('3，4', [(3, 3), (4, 4)]),
+    (' 2 - 2 ', [(2, 2)]),
+    ('-', [(1, None)]),  # 起止都省略：从第一页到最后一页
+])
+def test_parse_slide_ranges(spec, expected):
+    assert parse_slide_ranges(spec) == expected
+
+
+@pytest.mark.parametrize('spec', ['0', '0-3', '5-3', 'x', '1-x', '', ' , ', '1--3'])
+def test_parse_slide_ranges_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_slide_ranges(spec)
+
+
+@pytest.fixture
+def three_slide_deck(tmp_path):
+    prs = Presentation()
+    for i in range(3):
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        slide.shapes.add_textbox(0, 0, 100, 100).text_frame.text = f"第{i + 1}页"
+    path = str(tmp_path / 'three.pptx')
+    prs.save(path)
+    return path
+
+
+@pytest.mark.parametrize('spec, expected', [('1-3', [0, 1, 2]), ('3-', [2]), ('-', [0, 1, 2]), ('2,1', [0, 1])])
+def test_select_slides(three_slide_deck, spec, expected):
+    extractor = SmartPPTExtractor(three_slide_deck, engine='xml')
+    try:
+        assert extractor.select_slides(spec) == expected
+    finally:
+        extractor.close()
+
+
+@pytest.mark.parametrize('spec', ['4', '2-4', '4-', '1,9'])
+def test_select_slides_past_last_slide(three_slide_deck, spec):
+    extractor = SmartPPTExtractor(three_slide_deck, engine='xml')
+    try:
+        with pytest.raises(ValueError, match='共 3 页'):
+            extractor.select_slides(spec)
+    finally:
+        extractor.close()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+纯文本类导出格式的写入器：Markdown、纯文本、JSON Lines
+与 Word 写入器使用相同的接口（add_slide_heading / add_empty_notice / add_box / add_page_break / close），
+内容边生成边写入输出文件，不在内存中构建文档
+"""
+
+import json
+import re
+
+from docx_writer import DEFAULT_FONT, text_tier
+
+EMPTY_NOTICE = '【此页无文本内容】'
+
+# Markdown 中出现在行首时会被解析为标题、引用、列表的文本
+MD_BLOCK_MARKER = re.compile(r'^(\s*)([#>*+\-]|\d+[.)])')
+
+# 字号层级对应的 Markdown 标题级别（与 Word 样式层级一致），正文为普通段落
+MD_HEADING_LEVELS = {'title': 2, 'subtitle': 3, 'heading': 4}
+
+
+def md_escape_line(line):
+    """转义行首的 Markdown 块标记，使原文不被解析为标题或列表"""
+    return MD_BLOCK_MARKER.sub(r'\1\\\2', line)
+
+
+def md_cell(text):
+    """Markdown 表格单元格：竖线转义，换行改为 <br>"""
+    return text.replace('|', '\\|').replace('\n', '<br>')
+
+
+def table_text(table):
+    """表格的纯文本形式：单元格以制表符分隔，行以换行分隔（被合并覆盖的位置跳过）"""
+    return '\n'.join('\t'.join(cell['text'] for cell in row if cell) for row in table['rows'])
+
+
+def table_rows_text(table):
+    """表格各行的单元格文本，被合并覆盖的位置为空字符串"""
+    return [[cell['text'] if cell is not None else '' for cell in row] for row in table['rows']]
+
+
+class TextFileWriter:
+    """逐条写入 UTF-8 文本文件的写入器基类"""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.file = open(output_path, 'w', encoding='utf-8', newline='\n')
+        self.slide_num = 0
+
+    def add_slide_heading(self, slide_num):
+        self.slide_num = slide_num
+
+    def add_empty_notice(self):
+        pass
+
+    def add_box(self, box):
+        """写入一个文本框记录，表格记录的 table 不为 None"""
+        if box.table is not None:
+            self.add_table(box.table)
+        else:
+            self.add_text(box.text, box.font_size, box.font_name)
+
+    def add_text(self, text, font_size, font_name=DEFAULT_FONT):
+        raise NotImplementedError
+
+    def add_table(self, table):
+        raise NotImplementedError
+
+    def add_page_break(self):
+        pass
+
+    def close(self):
+        self.file.close()
+
+
+class MarkdownWriter(TextFileWriter):
+    """Markdown：幻灯片标题为一级标题，文本框按字号层级写为二到四级标题或段落，表格写为管道表格"""
+
+    def add_slide_heading(self, slide_num):
+        super().add_slide_heading(slide_num)
+        self.file.write(f'# 幻灯片 {slide_num}\n\n')
+
+    def add_empty_notice(self):
+        self.file.write(f'*{EMPTY_NOTICE}*\n\n')
+
+    def add_text(self, text, font_size, font_name=DEFAULT_FONT):
+        level = MD_HEADING_LEVELS.get(text_tier(font_size))
+        lines = [md_escape_line(line) for line in text.split('\n')]
+        if level is not None:
+            # 标题只能占一行
+            self.file.write(f"{'#' * level} {' '.join(line.strip() for line in lines)}\n\n")
+        else:
+            # 行尾两个空格为 Markdown 的段内换行
+            self.file.write('  \n'.join(lines) + '\n\n')
+
+    def add_table(self, table):
+        rows = table_rows_text(table)
+        # 管道表格的第一行即表头
+        lines = [f"| {' | '.join(md_cell(text) for text in row)} |" for row in rows]
+        lines.insert(1, f"|{'---|' * len(table['columns'])}")
+        self.file.write('\n'.join(lines) + '\n\n')
+
+    def add_page_break(self):
+        self.file.write('---\n\n')
+
+
+class PlainTextWriter(TextFileWriter):
+    """纯文本：每个文本框一段，段间空一行；表格每行一段，单元格以制表符分隔"""
+
+    def add_slide_heading(self, slide_num):
+        super().add_slide_heading(slide_num)
+        self.file.write(f'==== 幻灯片 {slide_num} ====\n\n')
+
+    def add_empty_notice(self):
+        self.file.write(f'{EMPTY_NOTICE}\n\n')
+
+    def add_text(self, text, font_size, font_name=DEFAULT_FONT):
+        self.file.write(f'{text}\n\n')
+
+    def add_table(self, table):
+        rows = table_rows_text(table)
+        self.file.write('\n'.join('\t'.join(text.replace('\n', ' ') for text in row) for row in rows) + '\n\n')
+
+
+class JsonLinesWriter(TextFileWriter):
+    """
+    JSON Lines：每个文本框一行，带页码、页内顺序、坐标尺寸（EMU）和字体信息
+    表格另有 rows 字段（二维单元格文本，被合并覆盖的位置为 null）；没有文本的页不输出
+    经 add_text / add_table 直接写入（没有文本框记录）时，坐标尺寸和缺少的字体信息为 null
+    """
+
+    def __init__(self, output_path):
+        super().__init__(output_path)
+        self.index = 0  # 页内顺序，每页从 1 开始
+
+    def add_slide_heading(self, slide_num):
+        super().add_slide_heading(slide_num)
+        self.index = 0
+
+    def add_box(self, box):
+        self.write_record(box.text, box.font_size, box.font_name, box.table,
+                          (box.left, box.top, box.width, box.height))
+
+    def add_text(self, text, font_size, font_name=DEFAULT_FONT):
+        self.write_record(text, font_size, font_name)
+
+    def add_table(self, table):
+        self.write_record(table_text(table), None, None, table)
+
+    def write_record(self, text, font_size, font_name, table=None, extents=(None, None, None, None)):
+        self.index += 1
+        left, top, width, height = extents
+        record = {
+            'slide': self.slide_num,
+            'index': self.index,
+            'type': 'text' if table is None else 'table',
+            'text': text,
+            'left': left,
+            'top': top,
+            'width': width,
+            'height': height,
+            'font_size': font_size,
+            'font_name': font_name,
+        }
+        if table is not None:
+            record['rows'] = [[cell['text'] if cell is not None else None for cell in row]
+                              for row in table['rows']]
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
@@ -28,6 +28,11 @@ fi
 echo -e "${BLUE}[1/3]${NC} 📋 更新 Python 代码..."
 cp "$CURRENT_DIR/server.py" "$APPLICATIONS_PATH/Contents/Resources/"
 cp "$CURRENT_DIR/extract_ppt.py" "$APPLICATIONS_PATH/Contents/Resources/"
+cp "$CURRENT_DIR/docx_writer.py" "$APPLICATIONS_PATH/Contents/Resources/"
+cp "$CURRENT_DIR/text_writers.py" "$APPLICATIONS_PATH/Contents/Resources/"
+cp "$CURRENT_DIR/xy_cut.py" "$APPLICATIONS_PATH/Contents/Resources/"
+cp "$CURRENT_DIR/boilerplate.py" "$APPLICATIONS_PATH/Contents/Resources/"
+cp "$CURRENT_DIR/sse_server.py" "$APPLICATIONS_PATH/Contents/Resources/"
 echo -e "${GREEN}      ✓ Python 代码已更新${NC}"
 
 echo -e "${BLUE}[2/3]${NC} 🎨 更新 Web UI 文件..."
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XY-cut 阅读顺序
+把文本框投影到纵轴和横轴上，在投影的空白间隙处切分：横向切出的各行从上到下，
+纵向切出的各列从左到右，再对每一块递归切分；无法再切的块内按从上到下、从左到右排列。
+每次选择两个方向中最宽的间隙，只在接近最宽的间隙处切分（较窄的段间距留给下一层），
+等宽时先切行：卡片网格按行阅读，分栏正文（栏间距大于段间距）按列阅读，通栏标题先于下方的分栏。
+
+numpy 为可选依赖：安装时大块的坐标计算使用数组运算，否则全部使用纯 Python，结果完全相同
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 块内文本框数不少于该值时使用 numpy，更小的块纯 Python 更快
+NUMPY_MIN_BOXES = 256
+
+# 投影间隙宽度（EMU）超过该值才切分，0 表示任何空白都切分
+MIN_GAP = 0
+
+# 同一层只在不小于最宽间隙该比例的间隙处切分
+CUT_RATIO = 0.5
+
+
+def box_extents(text_boxes):
+    """文本框的 (左, 上, 右, 下) 坐标；宽高缺失或为 0 的文本框按 1 EMU 处理"""
+    return [(box.left, box.top,
+             box.left + max(box.width or 0, 1),
+             box.top + max(box.height or 0, 1)) for box in text_boxes]
+
+
+def split_python(indices, starts, ends, min_gap):
+    """
+    纯 Python：按起点排序后扫描投影，返回 (最大间隙宽度, 切分后的各段)，没有间隙时返回 (None, None)
+    """
+    order = sorted(indices, key=starts.__getitem__)
+    gaps = []   # (在 order 中的位置, 间隙宽度)
+    reach = ends[order[0]]
+    for position in range(1, len(order)):
+        i = order[position]
+        gap = starts[i] - reach
+        if gap > min_gap:
+            gaps.append((position, gap))
+        if ends[i] > reach:
+            reach = ends[i]
+    if not gaps:
+        return None, None
+
+    widest = max(gap for _, gap in gaps)
+    segments = []
+    begin = 0
+    for position, gap in gaps:
+        if gap >= widest * CUT_RATIO:
+            segments.append(order[begin:position])
+            begin = position
+    segments.append(order[begin:])
+    return widest, segments
+
+
+def split_numpy(indices, starts, ends, min_gap):
+    """numpy 版 split_python：累计最大值得到投影覆盖的右边界，与下一个起点比较找出间隙"""
+    order = indices[np.argsort(starts[indices], kind='stable')]
+    reach = np.maximum.accumulate(ends[order])
+    gaps = starts[order[1:]] - reach[:-1]
+    widest = gaps.max() if len(gaps) else 0
+    if widest <= min_gap:
+        return None, None
+    cuts = np.flatnonzero((gaps > min_gap) & (gaps >= widest * CUT_RATIO))
+    return widest, np.split(order, cuts + 1)
+
+
+def xy_cut_order(extents, min_gap=MIN_GAP):
+    """按 XY-cut 阅读顺序返回文本框下标列表，extents 为 box_extents 的结果"""
+    count = len(extents)
+    if count < 2:
+        return list(range(count))
+
+    columns = list(zip(*extents))
+    arrays = [np.array(column, dtype=np.int64) for column in columns] if np is not None else None
+    order = []
+    # 显式栈代替递归：文本框很多时切分层数可能很深
+    stack = [list(range(count))]
+    while stack:
+        block = stack.pop()
+        if len(block) == 1:
+            order.append(int(block[0]))
+            continue
+
+        if arrays is not None and len(block) >= NUMPY_MIN_BOXES:
+            left, top, right, bottom = arrays
+            block = np.asarray(block)
+            split = split_numpy
+        else:
+            left, top, right, bottom = columns
+            if not isinstance(block, list):
+                block = block.tolist()
+            split = split_python
+
+        row_gap, rows = split(block, top, bottom, min_gap)
+        column_gap, cols = split(block, left, right, min_gap)
+        if rows is None and cols is None:
+            # 无法再切分：从上到下，同一高度从左到右
+            order.extend(sorted((int(i) for i in block), key=lambda i: (columns[1][i], columns[0][i])))
+            continue
+
+        if cols is None or (rows is not None and row_gap >= column_gap):
+            segments = rows
+        else:
+            segments = cols
+        if all(len(segment) == 1 for segment in segments):
+            # 切分到单个文本框（如网格的一行），直接按顺序输出
+            order.extend(int(segment[0]) for segment in segments)
+        else:
+            # 栈顶先处理，倒序压栈以保持阅读顺序
+            stack.extend(reversed(segments))
+    return order
+
+
+def xy_cut_sort(text_boxes, min_gap=MIN_GAP):
+    """按 XY-cut 阅读顺序排列文本框"""
+    return [text_boxes[i] for i in xy_cut_order(box_extents(text_boxes), min_gap)]